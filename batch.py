@@ -0,0 +1,56 @@
+import bstar as b
+import perception as p
+import environment as e
+import map_file as m
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+def plan_scenario(scenario: dict):
+    # RUNS IN A WORKER PROCESS. A SCENARIO CARRIES A READY occupancy_grid, A map_path SAVED WITH map_file.MapFile OR THE SAME SETTINGS AS main.py.
+    movement = scenario.get('movement', 'queen')
+    max_speed = scenario.get('max_speed', 1)
+    k_factor = scenario.get('k_factor', 0.5)
+    obstacle_penalty = scenario.get('obstacle_penalty', 500)
+    if 'occupancy_grid' in scenario:
+        return b.Bstar(scenario['occupancy_grid'], obstacle_penalty).find_path(movement, max_speed, k_factor)
+    if 'map_path' in scenario:
+        # EVERY WORKER MAPS THE SAME FILE, SO A LARGE MAP IS NEITHER PICKLED NOR COPIED PER PROCESS.
+        return b.Bstar(m.MapFile(scenario['map_path']).load(), obstacle_penalty).find_path(movement, max_speed, k_factor)
+    environment = e.Environment(scenario['grid_h'], scenario['grid_w'])
+    watcher = p.Perception(environment)
+    environment.set_start(scenario['start_x'], scenario['start_y'])
+    environment.set_end(scenario['end_x'], scenario['end_y'])
+    environment.set_obstacles(scenario.get('obstacles', {}))
+    environment.set_global_path()
+    watcher.get_obstacles()
+    path = environment.robot_path
+    planner = None
+    if len(path) == 0:
+        # START AND END ARE NOT ON ONE ROW OR COLUMN, SO THERE IS NO STRAIGHT PATH TO CHECK AND THE FIRST PLAN SEES THE OBSTACLES WHERE THEY ARE NOW.
+        occupancy_grid = watcher.get_occupancy_grid({0: {'colliding': {}, 'other': {obstacle_id: environment.get_obstacle(obstacle_id, 0) for obstacle_id in environment.obstacle_ids}}})
+        planner = b.Bstar(occupancy_grid, obstacle_penalty)
+        path = planner.find_path(movement, max_speed, k_factor)
+        if path is None:
+            return None
+        watcher.get_obstacles(path)
+    while len(watcher.obstacles) > 0:
+        if planner is None:
+            occupancy_grid = watcher.get_occupancy_grid()
+            planner = b.Bstar(occupancy_grid, obstacle_penalty)
+            path = planner.find_path(movement, max_speed, k_factor)
+        else:
+            path = planner.replan(watcher.update_occupancy_grid(occupancy_grid), movement, max_speed, k_factor)
+        if path is None:
+            return None
+        watcher.get_obstacles(path)
+    return path
+
+class BatchPlanner:
+    def __init__(self, max_workers=None):
+        self.max_workers = max_workers
+
+    def plan(self, scenarios: list):
+        # YIELDS (scenario index, path) IN THE ORDER THE WORKERS FINISH, NOT THE ORDER OF scenarios.
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(plan_scenario, scenario): index for index, scenario in enumerate(scenarios)}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
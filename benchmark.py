@@ -0,0 +1,131 @@
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tracemalloc
+import bstar as b
+import perception as p
+import environment as e
+import instrumentation as i
+
+SIZES = [20, 50, 100, 200]
+# ONLY RUN WITH --large, ONE 2000x2000 SCENARIO SEARCHES FOR ABOUT 40 s AND THE MEMORY PASS RUNS IT AGAIN.
+LARGE_SIZES = [500, 1000, 2000]
+DENSITIES = [0.0, 1.0, 5.0]
+MOVEMENTS = ['queen', 'rook']
+MAX_SPEEDS = [1, 4]
+K_FACTORS = [0.5]
+OBSTACLE_PENALTY = 500
+
+def make_scenario(size, density, movement, max_speed, k_factor, seed):
+    # density IS OBSTACLES PER 1000 CELLS. START AND END SIT ON OPPOSITE EDGES AND ARE KEPT OUT OF EVERY REPULSION OVAL AT TIMESTEP 0.
+    rng = random.Random(seed)
+    start_x, start_y = rng.randrange(size), size - 1
+    end_x, end_y = rng.randrange(size), 0
+    obstacles = {}
+    obstacle_count = int(density * size * size / 1000)
+    for attempt in range(100 * obstacle_count):
+        if len(obstacles) == obstacle_count:
+            break
+        major, minor = rng.randint(1, 3), rng.randint(0, 2)
+        obstacle = {'x': rng.randrange(size), 'y': rng.randrange(2, max(3, size - 2)), 'dx': rng.randint(-1, 1), 'dy': rng.randint(-1, 1), 'major_axis': [-major, major], 'minor_axis': [-minor, minor]}
+        reach = (major * max(abs(obstacle['dx']), abs(obstacle['dy']))) + minor
+        if all([abs(obstacle['x'] - x) > reach or abs(obstacle['y'] - y) > reach for x, y in [(start_x, start_y), (end_x, end_y)]]):
+            obstacles[len(obstacles)] = obstacle
+    return {'size': size, 'density': density, 'obstacle_count': len(obstacles), 'movement': movement, 'max_speed': max_speed, 'k_factor': k_factor, 'seed': seed,
+            'start_x': start_x, 'start_y': start_y, 'end_x': end_x, 'end_y': end_y, 'obstacles': obstacles}
+
+def run_scenario(scenario):
+    environment = e.Environment(scenario['size'], scenario['size'])
+    watcher = p.Perception(environment)
+    environment.set_start(scenario['start_x'], scenario['start_y'])
+    environment.set_end(scenario['end_x'], scenario['end_y'])
+    environment.set_obstacles(scenario['obstacles'])
+    timings = {}
+    start_time = time.perf_counter()
+    occupancy_grid = watcher.get_occupancy_grid({0: {'colliding': {}, 'other': {obstacle_id: environment.get_obstacle(obstacle_id, 0) for obstacle_id in environment.obstacle_ids}}})
+    timings['grid'] = time.perf_counter() - start_time
+    planner = b.Bstar(occupancy_grid, OBSTACLE_PENALTY, i.Instrumentation())
+    start_time = time.perf_counter()
+    if scenario.get('jump_points', False):
+        planner.search_jump_points(scenario['movement'], scenario['k_factor'])
+    else:
+        planner.search(scenario['movement'], scenario['k_factor'])
+    timings['search'] = time.perf_counter() - start_time
+    start_time = time.perf_counter()
+    path = planner.extract_path(scenario['movement'], scenario['max_speed'])
+    timings['extraction'] = time.perf_counter() - start_time
+    return planner, path, timings
+
+def measure_scenario(scenario, memory=True):
+    # TIMINGS COME FROM A RUN WITHOUT tracemalloc, PEAK MEMORY FROM A SECOND RUN WITH IT, SINCE TRACING SLOWS PYTHON CODE DOWN.
+    result = {key: scenario[key] for key in scenario if key != 'obstacles'}
+    try:
+        planner, path, timings = run_scenario(scenario)
+    except Exception as error:
+        result['error'] = f'{type(error).__name__}: {error}'
+        return result
+    result['timings'] = timings
+    if path is None:
+        result['error'] = 'NO PATH'
+        return result
+    result['nodes_expanded'] = int(planner.expanded_flags.sum())
+    result['counters'] = planner.instrumentation.counters
+    result['path_steps'] = len(path) - 1
+    result['path_cost'] = sum([path[timestep]['speed'] for timestep in path])
+    if memory:
+        tracemalloc.start()
+        run_scenario(scenario)
+        result['peak_memory'] = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+    return result
+
+def get_key(result):
+    return f"{result['size']}-{result['density']}-{result['movement']}-{result['max_speed']}-{result['k_factor']}-{result['seed']}"
+
+def compare(results, baseline_results):
+    # PRINTS current / baseline FOR EVERY TIMING OF EVERY SCENARIO BOTH RUNS HAVE, BELOW 1.0 IS FASTER.
+    baseline = {get_key(result): result for result in baseline_results}
+    for result in results:
+        key = get_key(result)
+        if key in baseline and 'timings' in result and 'timings' in baseline[key]:
+            ratios = {phase: result['timings'][phase] / baseline[key]['timings'][phase] if baseline[key]['timings'][phase] > 0 else float('nan') for phase in result['timings']}
+            print(key, ' '.join([f'{phase}={ratios[phase]:.2f}' for phase in ratios]), file=sys.stderr)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='HEADLESS Bstar BENCHMARK, WRITES ONE JSON DOCUMENT OF RESULTS.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    parser.add_argument('--large', action='store_true')
+    parser.add_argument('--densities', type=float, nargs='+', default=DENSITIES)
+    parser.add_argument('--movements', nargs='+', default=MOVEMENTS, choices=['queen', 'rook'])
+    parser.add_argument('--max-speeds', type=int, nargs='+', default=MAX_SPEEDS)
+    parser.add_argument('--k-factors', type=float, nargs='+', default=K_FACTORS)
+    parser.add_argument('--seeds', type=int, default=1)
+    parser.add_argument('--jump-points', action='store_true')
+    parser.add_argument('--no-memory', action='store_true')
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--compare', default=None)
+    args = parser.parse_args()
+    results = []
+    for size in args.sizes + (LARGE_SIZES if args.large else []):
+        for density in args.densities:
+            for movement in args.movements:
+                for max_speed in args.max_speeds:
+                    for k_factor in args.k_factors:
+                        for seed in range(args.seeds):
+                            scenario = make_scenario(size, density, movement, max_speed, k_factor, seed)
+                            scenario['jump_points'] = args.jump_points
+                            result = measure_scenario(scenario, not args.no_memory)
+                            print(get_key(result), result.get('timings', result.get('error')), file=sys.stderr)
+                            results.append(result)
+    document = {'python': platform.python_version(), 'platform': platform.platform(), 'results': results}
+    if args.output is None:
+        print(json.dumps(document, indent=2))
+    else:
+        with open(args.output, 'w') as file:
+            json.dump(document, file, indent=2)
+    if args.compare is not None:
+        with open(args.compare) as file:
+            compare(results, json.load(file)['results'])
@@ -1,81 +1,574 @@
 import math
+import time
+import heapq
+import numpy as np
 
 class Bstar:
-    def __init__(self, occupancy_grid, obstacle_penalty):
+    def __init__(self, occupancy_grid, obstacle_penalty, instrumentation=None):
         self.occupancy_grid = occupancy_grid
         self.obstacle_penalty = obstacle_penalty
+        self.instrumentation = instrumentation
         self.open_list = []
-        self.closed_list = []
+        self.open_flags = np.zeros((occupancy_grid.grid_h, occupancy_grid.grid_w), dtype=bool)
+        self.closed_flags = np.zeros((occupancy_grid.grid_h, occupancy_grid.grid_w), dtype=bool)
+        self.expanded_flags = np.zeros((occupancy_grid.grid_h, occupancy_grid.grid_w), dtype=bool)
+        self.push_count = 0
+        self.g = None
+        self.rhs = None
+        self.k_factor = 0.5
+        self.repair_threshold = None
+        self.seen_flags = None
+        self.incons_flags = None
+        self.expansion_count = 0
+
+    # (movement, distance) -> OFFSETS AND STEP COSTS, SHARED BY ALL PLANNERS AND FILLED THE FIRST TIME A PAIR IS ASKED FOR.
+    offset_table = {}
+    cost_table = {}
 
     def get_offsets_based_on_movement(self, movement, max_distance):
-        move_offsets = []
-        if movement == 'queen':
-            for i in range(-1 * max_distance, max_distance + 1, 1):
-                for j in range(-1 * max_distance, max_distance + 1, 1):
-                    if i != 0 or j != 0:
-                        move_offsets.append([i, j])
-        elif movement == 'rook':
-            for i in range(-1 * max_distance, max_distance + 1, 1):
-                for j in range(-1 * max_distance, max_distance + 1, 1):
-                    if (i == 0 and j != 0) or (i != 0 and j == 0):
-                        move_offsets.append([i, j])
-        return move_offsets
+        if (movement, max_distance) not in Bstar.offset_table:
+            move_offsets = []
+            if movement == 'queen':
+                for i in range(-1 * max_distance, max_distance + 1, 1):
+                    for j in range(-1 * max_distance, max_distance + 1, 1):
+                        if i != 0 or j != 0:
+                            move_offsets.append((i, j))
+            elif movement == 'rook':
+                for i in range(-1 * max_distance, max_distance + 1, 1):
+                    for j in range(-1 * max_distance, max_distance + 1, 1):
+                        if (i == 0 and j != 0) or (i != 0 and j == 0):
+                            move_offsets.append((i, j))
+            Bstar.offset_table[(movement, max_distance)] = move_offsets
+            Bstar.cost_table[(movement, max_distance)] = [math.sqrt(math.pow(i, 2) + math.pow(j, 2)) for i, j in move_offsets]
+        return Bstar.offset_table[(movement, max_distance)]
+
+    def get_moves_based_on_movement(self, movement, max_distance):
+        return zip(self.get_offsets_based_on_movement(movement, max_distance), Bstar.cost_table[(movement, max_distance)])
 
     def euclidian_distance(self, x1, y1, x2, y2):
         return math.sqrt(math.pow(x2 - x1, 2) + math.pow(y2 - y1, 2))
 
+    def get_priority(self, x, y, k_factor=0.5):
+        return (k_factor * self.occupancy_grid.k[y, x]) + ((1 - k_factor) * self.occupancy_grid.start_distance[y, x])
+
+    def push_open(self, x, y, k_factor=0.5):
+        # ENTRIES ARE NEVER UPDATED IN PLACE, A CHEAPER k IS PUSHED AGAIN AND THE OLD ENTRY IS SKIPPED WHEN IT REACHES THE TOP.
+        self.open_flags[y, x] = True
+        self.push_count = self.push_count + 1
+        if self.instrumentation is not None:
+            self.instrumentation.count('pushes')
+        heapq.heappush(self.open_list, (self.get_priority(x, y, k_factor), self.push_count, x, y, self.occupancy_grid.k[y, x]))
+
+    def discard_stale(self):
+        while len(self.open_list) > 0:
+            priority, count, x, y, k = self.open_list[0]
+            if self.open_flags[y, x] and k == self.occupancy_grid.k[y, x]:
+                break
+            heapq.heappop(self.open_list)
+
+    def peek_open(self):
+        self.discard_stale()
+        if len(self.open_list) > 0:
+            return self.open_list[0][2], self.open_list[0][3]
+        return None
+
+    def pop_open(self):
+        self.discard_stale()
+        priority, count, x, y, k = heapq.heappop(self.open_list)
+        self.open_flags[y, x] = False
+        if self.instrumentation is not None:
+            self.instrumentation.count('pops')
+        return self.occupancy_grid[x, y]
+
     def weighted_expansion(self, x, y, movement='queen', k_factor=0.5):
-        for dx, dy in self.get_offsets_based_on_movement(movement, 1):
+        # (x, y) IS THE TOP OF THE OPEN LIST AND LEAVES IT BEFORE ITS NEIGHBOURS GO IN, OTHERWISE WITH k_factor < 0.5 A NEIGHBOUR COULD BE POPPED AND CLOSED WITHOUT EVER BEING EXPANDED.
+        top_node = self.pop_open()
+        self.expanded_flags[y, x] = True
+        if self.instrumentation is not None:
+            self.instrumentation.expanded(self, x, y)
+        for (dx, dy), cost in self.get_moves_based_on_movement(movement, 1):
             index_x, index_y = x + dx, y + dy
             if self.occupancy_grid.is_inside_grid(index_x, index_y):
                 if self.occupancy_grid.is_free_to_move(index_x, index_y):
-                    if self.occupancy_grid[index_x, index_y] not in self.open_list and self.occupancy_grid[index_x, index_y] not in self.closed_list:
-                        self.occupancy_grid[index_x, index_y]['k'] = self.occupancy_grid[x, y]['k'] + self.euclidian_distance(x, y, index_x, index_y)
-                        self.open_list.append(self.occupancy_grid[index_x, index_y])
-                    else:
-                        new_k = self.occupancy_grid[x, y]['k'] + self.euclidian_distance(x, y, index_x, index_y)
-                        if new_k <= self.occupancy_grid[index_x, index_y]['k']:
-                            self.occupancy_grid[index_x, index_y]['k'] = new_k
-                            self.open_list[self.open_list.index(self.occupancy_grid[index_x, index_y])]['k'] = self.occupancy_grid[index_x, index_y]['k']
+                    new_k = self.occupancy_grid.k[y, x] + cost
+                    if not self.open_flags[index_y, index_x] and not self.closed_flags[index_y, index_x]:
+                        # seen_flags IS ONLY SET BETWEEN find_path_anytime PASSES, WHERE A REOPENED CELL KEEPS ITS k UNLESS THE NEW ONE IS CHEAPER.
+                        if self.seen_flags is None or not self.seen_flags[index_y, index_x] or new_k < self.occupancy_grid.k[index_y, index_x]:
+                            self.occupancy_grid.k[index_y, index_x] = new_k
+                            self.push_open(index_x, index_y, k_factor)
+                    elif new_k < self.occupancy_grid.k[index_y, index_x]:
+                        self.occupancy_grid.k[index_y, index_x] = new_k
+                        if self.instrumentation is not None:
+                            self.instrumentation.count('relaxations')
+                        if self.open_flags[index_y, index_x]:
+                            self.push_open(index_x, index_y, k_factor)
+                        elif self.incons_flags is not None:
+                            self.incons_flags[index_y, index_x] = True
                 else:
-                    self.occupancy_grid[index_x, index_y]['k'] = self.obstacle_penalty
+                    self.occupancy_grid.k[index_y, index_x] = self.obstacle_penalty
             else:
                 continue
-        self.open_list = sorted(self.open_list, key=lambda a: (k_factor * a['k']) + ((1 - k_factor) * a['start_distance']))
-        return self.open_list.pop(0)
+        return top_node
+
+    def find_path(self, movement='queen', max_speed=1, k_factor=0.5, jump_points=False):
+        # RETURNS None WHEN THE END CANNOT REACH THE START. jump_points=True PRUNES SYMMETRIC EXPANSIONS WITH JUMP POINT SEARCH.
+        if jump_points:
+            found = self.search_jump_points(movement, k_factor)
+        else:
+            found = self.search(movement, k_factor)
+        if not found:
+            return None
+        return self.extract_path(movement, max_speed)
 
-    def find_path(self, movement='queen', max_speed=1, k_factor=0.5):
+    def search(self, movement='queen', k_factor=0.5, deadline=None, max_expansions=None):
+        # RETURNS True ONCE THE START IS REACHED, False WHEN THE OPEN LIST RUNS OUT BECAUSE NO PATH EXISTS AND None WHEN deadline (time.perf_counter) OR max_expansions COMES FIRST.
+        if self.instrumentation is not None:
+            self.instrumentation.start_timer('search')
         x, y = self.occupancy_grid.end_x, self.occupancy_grid.end_y
-        self.occupancy_grid[x, y]['k'] = 0
-        self.open_list.append(self.occupancy_grid[x, y])
+        self.occupancy_grid.k[y, x] = 0
+        self.push_open(x, y, k_factor)
+        found = self.expand_open(movement, k_factor, deadline, max_expansions)
+        if self.instrumentation is not None:
+            self.instrumentation.stop_timer('search')
+            self.instrumentation.search_done(self)
+        return found
+
+    def expand_open(self, movement='queen', k_factor=0.5, deadline=None, max_expansions=None):
+        expansions = 0
+        while True:
+            next_node = self.peek_open()
+            if next_node is None:
+                return False
+            x, y = next_node
+            if x == self.occupancy_grid.start_x and y == self.occupancy_grid.start_y:
+                return True
+            if (max_expansions is not None and expansions >= max_expansions) or (deadline is not None and time.perf_counter() >= deadline):
+                return None
+            top_node = self.weighted_expansion(x, y, movement, k_factor)
+            self.closed_flags[top_node['y'], top_node['x']] = True
+            # AN END INSIDE A REPULSION ZONE IS PENALISED BY ITS NEIGHBOURS LIKE ANY BLOCKED CELL, BUT IT STAYS THE ZERO extract_path WALKS DOWN TO.
+            self.occupancy_grid.k[self.occupancy_grid.end_y, self.occupancy_grid.end_x] = 0
+            expansions = expansions + 1
+            self.expansion_count = self.expansion_count + 1
+
+    def reopen(self, k_factor=0.5):
+        # ARA* STYLE HAND OVER BETWEEN PASSES: THE OPEN CELLS AND THE CLOSED CELLS WHOSE k DROPPED AFTER THEY WERE EXPANDED ARE QUEUED AGAIN UNDER THE NEW k_factor AND NOTHING STAYS CLOSED.
+        cells = np.argwhere(self.open_flags | self.incons_flags)
+        self.seen_flags = self.seen_flags | self.closed_flags
+        self.open_list = []
+        self.open_flags[:, :] = False
+        self.closed_flags[:, :] = False
+        self.incons_flags[:, :] = False
+        for y, x in cells.tolist():
+            self.push_open(x, y, k_factor)
+
+    def find_path_anytime(self, movement='queen', max_speed=1, time_budget=None, expansion_budget=None, k_factors=(0.2, 0.3, 0.4, 0.5)):
+        # ONE PASS PER k_factor, FROM A GREEDY ONE TOWARDS 0.5 (PLAIN A*), EACH PASS REUSING THE k FIELD OF THE LAST AND RETURNING A PATH AT LEAST AS GOOD.
+        # RETURNS (path, status): 'done' AFTER THE LAST PASS, 'out of budget' WITH THE PATH OF THE LAST FINISHED PASS (None IF THERE IS NONE YET) AND 'no path' WHEN THE END CANNOT REACH THE START.
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        self.seen_flags = np.zeros(self.closed_flags.shape, dtype=bool)
+        self.incons_flags = np.zeros(self.closed_flags.shape, dtype=bool)
+        self.expansion_count = 0
+        path = None
+        for index, k_factor in enumerate(k_factors):
+            max_expansions = None if expansion_budget is None else max(expansion_budget - self.expansion_count, 0)
+            if index == 0:
+                found = self.search(movement, k_factor, deadline, max_expansions)
+            else:
+                self.reopen(k_factor)
+                found = self.expand_open(movement, k_factor, deadline, max_expansions)
+            if found is None:
+                return path, 'out of budget'
+            if not found:
+                return None, 'no path'
+            path = self.extract_path(movement, max_speed)
+            if path is None:
+                return None, 'no path'
+        return path, 'done'
+
+    def is_blocked(self, x, y):
+        return self.occupancy_grid.is_inside_grid(x, y) and not self.occupancy_grid.is_free_to_move(x, y)
+
+    def is_jump_free(self, x, y):
+        return self.occupancy_grid.is_inside_grid(x, y) and self.occupancy_grid.is_free_to_move(x, y)
+
+    def get_forced_directions(self, x, y, dx, dy, movement='queen'):
+        # NEIGHBOURS OF (x, y), ENTERED MOVING (dx, dy), THAT ONLY (x, y) CAN REACH OPTIMALLY BECAUSE A BLOCKED OR REPULSION CELL CUTS OFF THE USUAL ROUTE.
+        # queen DIAGONALS NEED ONLY A FREE TARGET CELL, THE SAME AS weighted_expansion, AND rook PATHS ARE KEPT HORIZONTAL FIRST.
+        forced = []
+        if movement == 'queen':
+            if dx != 0 and dy != 0:
+                if self.is_blocked(x - dx, y) and self.is_jump_free(x - dx, y + dy):
+                    forced.append((-dx, dy))
+                if self.is_blocked(x, y - dy) and self.is_jump_free(x + dx, y - dy):
+                    forced.append((dx, -dy))
+            elif dx != 0:
+                for side in [-1, 1]:
+                    if self.is_blocked(x, y + side) and self.is_jump_free(x + dx, y + side):
+                        forced.append((dx, side))
+            else:
+                for side in [-1, 1]:
+                    if self.is_blocked(x + side, y) and self.is_jump_free(x + side, y + dy):
+                        forced.append((side, dy))
+        elif dy != 0:
+            for side in [-1, 1]:
+                if self.is_blocked(x + side, y - dy) and self.is_jump_free(x + side, y):
+                    forced.append((side, 0))
+        return forced
+
+    def get_pruned_directions(self, x, y, parent, movement='queen'):
+        if parent is None:
+            return self.get_offsets_based_on_movement(movement, 1)
+        dx, dy = (x > parent[0]) - (x < parent[0]), (y > parent[1]) - (y < parent[1])
+        if movement == 'queen':
+            natural = [(dx, 0), (0, dy), (dx, dy)] if dx != 0 and dy != 0 else [(dx, dy)]
+        else:
+            natural = [(dx, 0), (0, 1), (0, -1)] if dx != 0 else [(0, dy)]
+        return natural + self.get_forced_directions(x, y, dx, dy, movement)
+
+    def jump(self, x, y, dx, dy, movement='queen'):
+        # WALKS FROM (x, y) IN (dx, dy) TO THE NEXT CELL THAT HAS TO BE EXPANDED: THE START, A CELL WITH A FORCED NEIGHBOUR, OR A queen DIAGONAL / rook HORIZONTAL CELL WHOSE SIDE SCANS FIND ONE.
         while True:
-            # self.occupancy_grid.plot_grid(2.0)
+            x, y = x + dx, y + dy
+            if not self.occupancy_grid.is_inside_grid(x, y):
+                return None
             if x == self.occupancy_grid.start_x and y == self.occupancy_grid.start_y:
+                return x, y
+            if not self.occupancy_grid.is_free_to_move(x, y):
+                return None
+            if len(self.get_forced_directions(x, y, dx, dy, movement)) > 0:
+                return x, y
+            if movement == 'queen' and dx != 0 and dy != 0:
+                if self.jump(x, y, dx, 0, movement) is not None or self.jump(x, y, 0, dy, movement) is not None:
+                    return x, y
+            elif movement == 'rook' and dx != 0:
+                if self.jump(x, y, 0, 1, movement) is not None or self.jump(x, y, 0, -1, movement) is not None:
+                    return x, y
+
+    def search_jump_points(self, movement='queen', k_factor=0.5):
+        # LIKE search, BUT ONLY JUMP POINTS GO ON THE OPEN LIST. ONCE THE START IS REACHED k IS CLEARED AND REWRITTEN ALONG THE WINNING CHAIN ONLY, SO extract_path FOLLOWS IT.
+        if self.instrumentation is not None:
+            self.instrumentation.start_timer('search')
+        grid = self.occupancy_grid
+        grid.k[grid.end_y, grid.end_x] = 0
+        parents = {(grid.end_x, grid.end_y): None}
+        self.push_open(grid.end_x, grid.end_y, k_factor)
+        found = False
+        while self.peek_open() is not None:
+            top_node = self.pop_open()
+            x, y = top_node['x'], top_node['y']
+            self.closed_flags[y, x] = True
+            self.expanded_flags[y, x] = True
+            if self.instrumentation is not None:
+                self.instrumentation.expanded(self, x, y)
+            if x == grid.start_x and y == grid.start_y:
+                found = True
+                break
+            for dx, dy in self.get_pruned_directions(x, y, parents[(x, y)], movement):
+                jump_point = self.jump(x, y, dx, dy, movement)
+                if jump_point is None or self.closed_flags[jump_point[1], jump_point[0]]:
+                    continue
+                index_x, index_y = jump_point
+                new_k = grid.k[y, x] + self.euclidian_distance(x, y, index_x, index_y)
+                if not self.open_flags[index_y, index_x] or new_k < grid.k[index_y, index_x]:
+                    grid.k[index_y, index_x] = new_k
+                    parents[(index_x, index_y)] = (x, y)
+                    self.push_open(index_x, index_y, k_factor)
+        if found:
+            grid.k[:, :] = np.nan
+            grid.k[grid.end_y, grid.end_x] = 0
+            chain = [(grid.start_x, grid.start_y)]
+            while parents[chain[-1]] is not None:
+                chain.append(parents[chain[-1]])
+            # WALKS BACK FROM THE END SO EVERY CELL BETWEEN TWO JUMP POINTS GETS ITS COST TO GO.
+            k = 0.0
+            for (x1, y1), (x2, y2) in zip(chain[::-1][:-1], chain[::-1][1:]):
+                dx, dy = (x2 > x1) - (x2 < x1), (y2 > y1) - (y2 < y1)
+                step = math.sqrt(math.pow(dx, 2) + math.pow(dy, 2))
+                x, y = x1, y1
+                grid.k[y, x] = k
+                while (x, y) != (x2, y2):
+                    x, y, k = x + dx, y + dy, k + step
+                    grid.k[y, x] = k
+        if self.instrumentation is not None:
+            self.instrumentation.stop_timer('search')
+            self.instrumentation.search_done(self)
+        return found
+
+    def find_cost_field(self, movement='queen'):
+        # EXPANDS FROM THE END UNTIL THE OPEN LIST RUNS OUT, SO EVERY REACHABLE CELL GETS ITS COST TO GO IN k.
+        if self.instrumentation is not None:
+            self.instrumentation.start_timer('cost_field')
+        x, y = self.occupancy_grid.end_x, self.occupancy_grid.end_y
+        self.occupancy_grid.k[y, x] = 0
+        self.push_open(x, y, 1.0)
+        while True:
+            top_node = self.weighted_expansion(x, y, movement, 1.0)
+            self.closed_flags[top_node['y'], top_node['x']] = True
+            next_node = self.peek_open()
+            if next_node is None:
                 break
+            x, y = next_node
+        self.occupancy_grid.k[self.occupancy_grid.end_y, self.occupancy_grid.end_x] = 0
+        if self.instrumentation is not None:
+            self.instrumentation.stop_timer('cost_field')
+            self.instrumentation.search_done(self)
+        return self.occupancy_grid.k
+
+    def find_paths(self, starts, movement='queen', max_speed=1, cost_field_cache=None):
+        # ONE COST FIELD SERVES EVERY START, A PATH IS None WHEN ITS START CANNOT REACH THE END.
+        if cost_field_cache is not None:
+            key = cost_field_cache.get_key(self.occupancy_grid, movement, self.obstacle_penalty)
+            field = cost_field_cache.get_field(key)
+            if field is None:
+                cost_field_cache.put_field(key, self.find_cost_field(movement))
             else:
-                top_node = self.weighted_expansion(x, y, movement, k_factor)
-                self.closed_list.append(top_node)
-                if len(self.open_list) > 0:
-                    x, y = self.open_list[0]['x'], self.open_list[0]['y']
-        # self.occupancy_grid.plot_grid(pause_time=10.0)
+                self.occupancy_grid.k[:, :] = field
+        else:
+            self.find_cost_field(movement)
+        paths = []
+        for start_x, start_y in starts:
+            if not self.occupancy_grid.is_inside_grid(start_x, start_y):
+                raise ValueError("START CANNOT BE OUTSIDE GRID.")
+            if np.isnan(self.occupancy_grid.k[start_y, start_x]):
+                paths.append(None)
+            else:
+                paths.append(self.extract_path(movement, max_speed, start_x, start_y))
+        return paths
+
+    def get_path_k(self, x, y):
+        # AFTER A replan ONLY CELLS THE REPAIR HAS SETTLED ARE TRUSTED, THE REST OF THE k FIELD MAY STILL BE STALE.
+        if self.g is None or not self.is_expandable(x, y):
+            return self.occupancy_grid.k[y, x]
+        if self.g[y, x] == self.rhs[y, x] and math.isfinite(self.g[y, x]) and self.get_repair_key(x, y, self.k_factor)[0] <= self.repair_threshold + 1e-9:
+            return self.g[y, x]
+        return np.nan
+
+    def extract_path(self, movement='queen', max_speed=1, start_x=None, start_y=None):
+        if self.instrumentation is not None:
+            self.instrumentation.start_timer('extraction')
         path = {}
         timestep = 0
         x, y = self.occupancy_grid.start_x, self.occupancy_grid.start_y
+        if start_x is not None and start_y is not None:
+            x, y = start_x, start_y
+        visited = {(x, y)}
         while True:
             path[timestep] = {'x': x, 'y': y, 'dx': 0, 'dy': 0, 'speed': 0.0}
             if x == self.occupancy_grid.end_x and y == self.occupancy_grid.end_y:
                 break
             else:
                 for speed in range(max_speed, 0, -1):
-                    moves = [[x + dx, y + dy] for dx, dy in self.get_offsets_based_on_movement(movement, speed) if self.occupancy_grid.is_inside_grid(x + dx, y + dy) and self.occupancy_grid[x + dx, y + dy]['k'] is not None]
-                    if speed > 1 and any([not self.occupancy_grid.is_free_to_move(index_x, index_y) for index_x, index_y in moves]):
+                    if speed > 1 and self.occupancy_grid.count_blocked_around(x, y, speed, movement) > 0:
                         continue
-                    else:
-                        moves = sorted(moves, key=lambda a: self.occupancy_grid[a[0], a[1]]['k'])
-                        x, y = moves[0]
-                        break
+                    best_k = None
+                    for dx, dy in self.get_offsets_based_on_movement(movement, speed):
+                        # CELLS HOLDING obstacle_penalty ARE BLOCKED, ONLY THE END MAY BE STEPPED ON WITHOUT BEING FREE.
+                        if self.occupancy_grid.is_inside_grid(x + dx, y + dy) and self.is_expandable(x + dx, y + dy):
+                            k = self.get_path_k(x + dx, y + dy)
+                            if not np.isnan(k) and (best_k is None or k < best_k):
+                                best_k, best_x, best_y = k, x + dx, y + dy
+                    # NOTHING LABELLED AROUND, OR A CELL ALREADY ON THE PATH (THE DESCENT IS DETERMINISTIC, SO IT WOULD GO IN CIRCLES), MEANS THE k FIELD HOLDS NO PATH FROM HERE.
+                    if best_k is None or (best_x, best_y) in visited:
+                        if self.instrumentation is not None:
+                            self.instrumentation.stop_timer('extraction')
+                        return None
+                    x, y = best_x, best_y
+                    visited.add((x, y))
+                    break
                 timestep = timestep + 1
                 path[timestep - 1]['dx'] = x - path[timestep - 1]['x']
                 path[timestep - 1]['dy'] = y - path[timestep - 1]['y']
                 path[timestep - 1]['speed'] = math.sqrt(math.pow(path[timestep - 1]['dx'], 2) + math.pow(path[timestep - 1]['dy'], 2))
+        if self.instrumentation is not None:
+            self.instrumentation.stop_timer('extraction')
+        return path
+
+    def is_expandable(self, x, y):
+        return self.occupancy_grid.is_free_to_move(x, y) or (x == self.occupancy_grid.end_x and y == self.occupancy_grid.end_y)
+
+    def shift_field(self, field, dx, dy, fill_value):
+        # shifted[y, x] = field[y + dy, x + dx], CELLS SHIFTED IN FROM OUTSIDE THE GRID GET fill_value.
+        grid_h, grid_w = field.shape
+        shifted = np.full(field.shape, fill_value, dtype=field.dtype)
+        shifted[max(0, -dy):grid_h - max(0, dy), max(0, -dx):grid_w - max(0, dx)] = field[max(0, dy):grid_h - max(0, -dy), max(0, dx):grid_w - max(0, -dx)]
+        return shifted
+
+    def get_repair_key(self, x, y, k_factor=0.5):
+        min_k = min(self.g[y, x], self.rhs[y, x])
+        return (k_factor * min_k) + ((1 - k_factor) * self.occupancy_grid.start_distance[y, x]), min_k
+
+    def push_repair(self, x, y, k_factor=0.5):
+        self.open_flags[y, x] = True
+        self.push_count = self.push_count + 1
+        if self.instrumentation is not None:
+            self.instrumentation.count('pushes')
+        priority, min_k = self.get_repair_key(x, y, k_factor)
+        heapq.heappush(self.open_list, (priority, min_k, self.push_count, x, y))
+
+    def discard_stale_repairs(self):
+        while len(self.open_list) > 0:
+            priority, min_k, count, x, y = self.open_list[0]
+            if self.open_flags[y, x] and min_k == min(self.g[y, x], self.rhs[y, x]):
+                break
+            heapq.heappop(self.open_list)
+
+    def initialize_repair(self, movement='queen', k_factor=0.5):
+        # TURNS THE k FIELD LEFT BY find_path INTO LPA* STATE, g IS THE COST OF EXPANDED CELLS AND rhs THE ONE STEP LOOKAHEAD FROM THEIR NEIGHBOURS.
+        grid = self.occupancy_grid
+        expandable = ~grid.obstacle & (grid.repulsion_factor == 0.0)
+        expandable[grid.end_y, grid.end_x] = True
+        self.g = np.where(self.expanded_flags | self.closed_flags, grid.k, np.inf)
+        self.g[~expandable] = np.inf
+        self.g[grid.end_y, grid.end_x] = 0.0
+        self.rhs = np.full(self.g.shape, np.inf)
+        for (dx, dy), cost in self.get_moves_based_on_movement(movement, 1):
+            self.rhs = np.minimum(self.rhs, self.shift_field(self.g, dx, dy, np.inf) + cost)
+        self.rhs[~expandable] = np.inf
+        self.rhs[grid.end_y, grid.end_x] = 0.0
+        reached = expandable & np.isfinite(self.rhs)
+        grid.k[reached] = self.rhs[reached]
+        self.open_list = []
+        self.open_flags[:, :] = False
+        for y, x in zip(*np.nonzero(self.g != self.rhs)):
+            self.push_repair(int(x), int(y), k_factor)
+
+    def update_vertex(self, x, y, movement='queen', k_factor=0.5):
+        grid = self.occupancy_grid
+        if not (x == grid.end_x and y == grid.end_y):
+            rhs = math.inf
+            if grid.is_free_to_move(x, y):
+                for (dx, dy), cost in self.get_moves_based_on_movement(movement, 1):
+                    index_x, index_y = x + dx, y + dy
+                    if grid.is_inside_grid(index_x, index_y) and self.is_expandable(index_x, index_y):
+                        rhs = min(rhs, self.g[index_y, index_x] + cost)
+            self.rhs[y, x] = rhs
+        self.open_flags[y, x] = False
+        if self.g[y, x] != self.rhs[y, x]:
+            self.push_repair(x, y, k_factor)
+        if not self.is_expandable(x, y):
+            grid.k[y, x] = self.obstacle_penalty
+        elif math.isfinite(self.rhs[y, x]):
+            grid.k[y, x] = self.rhs[y, x]
+        else:
+            grid.k[y, x] = np.nan
+
+    def update_neighbours(self, x, y, movement='queen', k_factor=0.5):
+        for dx, dy in self.get_offsets_based_on_movement(movement, 1):
+            if self.occupancy_grid.is_inside_grid(x + dx, y + dy):
+                self.update_vertex(x + dx, y + dy, movement, k_factor)
+
+    def compute_repair(self, movement='queen', k_factor=0.5):
+        # CELLS ON AN OPTIMAL ROUTE SHARE THE START'S PRIORITY WHEN k_factor IS 0.5, SO TIES WITH THE START ARE SETTLED TOO AND KEYS ARE COMPARED WITH A SMALL TOLERANCE.
+        start_x, start_y = self.occupancy_grid.start_x, self.occupancy_grid.start_y
+        while True:
+            self.discard_stale_repairs()
+            if len(self.open_list) == 0:
+                break
+            if self.open_list[0][0] > self.get_repair_key(start_x, start_y, k_factor)[0] + 1e-9 and self.g[start_y, start_x] == self.rhs[start_y, start_x]:
+                break
+            priority, min_k, count, x, y = heapq.heappop(self.open_list)
+            self.open_flags[y, x] = False
+            if self.instrumentation is not None:
+                self.instrumentation.count('pops')
+                self.instrumentation.expanded(self, x, y)
+            if self.g[y, x] > self.rhs[y, x]:
+                self.g[y, x] = self.rhs[y, x]
+            else:
+                self.g[y, x] = math.inf
+                self.update_vertex(x, y, movement, k_factor)
+            self.update_neighbours(x, y, movement, k_factor)
+        self.repair_threshold = self.get_repair_key(start_x, start_y, k_factor)[0]
+
+    def replan(self, changed_cells, movement='queen', max_speed=1, k_factor=0.5):
+        # REPAIRS THE k FIELD OF A PREVIOUS find_path AFTER THE GRID CHANGED AT changed_cells, E.G. THE CELLS RETURNED BY put_obstacle OR remove_obstacle.
+        self.k_factor = k_factor
+        if self.instrumentation is not None:
+            self.instrumentation.start_timer('repair')
+        if self.g is None:
+            self.initialize_repair(movement, k_factor)
+        affected_cells = set()
+        for x, y in changed_cells:
+            affected_cells.add((x, y))
+            for dx, dy in self.get_offsets_based_on_movement(movement, 1):
+                if self.occupancy_grid.is_inside_grid(x + dx, y + dy):
+                    affected_cells.add((x + dx, y + dy))
+        for x, y in affected_cells:
+            self.update_vertex(x, y, movement, k_factor)
+        self.compute_repair(movement, k_factor)
+        if self.instrumentation is not None:
+            self.instrumentation.stop_timer('repair')
+            self.instrumentation.search_done(self)
+        # A FRESH SEARCH NEVER REACHES A START IT CANNOT EXPAND, SO THE REPAIR MUST NOT WALK OUT OF ONE THROUGH ITS REPAIRED NEIGHBOURS EITHER.
+        start_x, start_y = self.occupancy_grid.start_x, self.occupancy_grid.start_y
+        if not self.is_expandable(start_x, start_y) or not math.isfinite(self.g[start_y, start_x]):
+            return None
+        return self.extract_path(movement, max_speed)
+
+    def is_free_to_sweep(self, x, y, dx, dy, timestep, reservation_table):
+        # THE ROBOT PASSES THROUGH EVERY CELL ON THE WAY TO (x + dx, y + dy), NONE OF THEM MAY BE BLOCKED OR RESERVED WHILE IT MOVES.
+        speed = max(abs(dx), abs(dy))
+        for i in range(1, speed + 1, 1):
+            index_x, index_y = x + round(dx * i / speed), y + round(dy * i / speed)
+            if not self.occupancy_grid.is_free_to_move(index_x, index_y):
+                return False
+            if reservation_table.is_reserved(index_x, index_y, timestep + 1) or (i < speed and reservation_table.is_reserved(index_x, index_y, timestep)):
+                return False
+        return True
+
+    def find_timed_path(self, reservation_table, movement='queen', max_speed=1, k_factor=0.5):
+        # SEARCHES (x, y, timestep) AGAINST THE KNOWN OBSTACLE TRAJECTORIES IN reservation_table, WAITING IN PLACE IS ALLOWED. RETURNS None IF NO PATH FITS THE HORIZON.
+        grid = self.occupancy_grid
+        # THE ROBOT IS ALREADY ON THE START AT TIMESTEP 0, MOVES ONLY CHECK THE TIMESTEPS AFTER IT.
+        if reservation_table.is_reserved(grid.start_x, grid.start_y, 0):
+            return None
+        reach = max_speed * (math.sqrt(2) if movement == 'queen' else 1)
+        moves = [(0, 0)] + self.get_offsets_based_on_movement(movement, max_speed)
+        open_list = []
+        parents = {(grid.start_x, grid.start_y, 0): None}
+        closed = set()
+        heapq.heappush(open_list, ((1 - k_factor) * grid.end_distance[grid.start_y, grid.start_x] / reach, 0, grid.start_x, grid.start_y, 0))
+        push_count = 0
+        while len(open_list) > 0:
+            priority, count, x, y, timestep = heapq.heappop(open_list)
+            if (x, y, timestep) in closed:
+                continue
+            closed.add((x, y, timestep))
+            if x == grid.end_x and y == grid.end_y:
+                return self.build_timed_path(parents, x, y, timestep)
+            if timestep + 1 >= reservation_table.horizon:
+                continue
+            for dx, dy in moves:
+                index_x, index_y = x + dx, y + dy
+                if not grid.is_inside_grid(index_x, index_y) or (index_x, index_y, timestep + 1) in closed:
+                    continue
+                if dx == 0 and dy == 0:
+                    if reservation_table.is_reserved(x, y, timestep + 1):
+                        continue
+                else:
+                    speed = max(abs(dx), abs(dy))
+                    if speed > 1 and grid.count_blocked_around(x, y, speed, movement) > 0:
+                        continue
+                    if not self.is_free_to_sweep(x, y, dx, dy, timestep, reservation_table):
+                        continue
+                if (index_x, index_y, timestep + 1) not in parents:
+                    parents[(index_x, index_y, timestep + 1)] = (x, y, timestep)
+                    push_count = push_count + 1
+                    heapq.heappush(open_list, ((k_factor * (timestep + 1)) + ((1 - k_factor) * grid.end_distance[index_y, index_x] / reach), push_count, index_x, index_y, timestep + 1))
+        return None
+
+    def build_timed_path(self, parents, x, y, timestep):
+        states = []
+        state = (x, y, timestep)
+        while state is not None:
+            states.append(state)
+            state = parents[state]
+        states.reverse()
+        path = {}
+        for x, y, timestep in states:
+            path[timestep] = {'x': x, 'y': y, 'dx': 0, 'dy': 0, 'speed': 0.0}
+            if timestep > 0:
+                path[timestep - 1]['dx'] = x - path[timestep - 1]['x']
+                path[timestep - 1]['dy'] = y - path[timestep - 1]['y']
+                path[timestep - 1]['speed'] = math.sqrt(math.pow(path[timestep - 1]['dx'], 2) + math.pow(path[timestep - 1]['dy'], 2))
         return path
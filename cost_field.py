@@ -0,0 +1,25 @@
+from collections import OrderedDict
+
+class CostFieldCache:
+    def __init__(self, max_size=32):
+        self.max_size = max_size
+        self.reset_cache()
+
+    def reset_cache(self):
+        self.fields = OrderedDict()
+
+    def get_key(self, occupancy_grid, movement, obstacle_penalty):
+        return (occupancy_grid.end_x, occupancy_grid.end_y, movement, obstacle_penalty, occupancy_grid.get_snapshot_key())
+
+    def get_field(self, key):
+        if key not in self.fields:
+            return None
+        self.fields.move_to_end(key)
+        return self.fields[key]
+
+    def put_field(self, key, field):
+        # LEAST RECENTLY USED FIELDS ARE DROPPED ONCE max_size IS REACHED.
+        self.fields[key] = field.copy()
+        self.fields.move_to_end(key)
+        while len(self.fields) > self.max_size:
+            self.fields.popitem(last=False)
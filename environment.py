@@ -1,5 +1,8 @@
 import math
 import grid as g
+import numpy as np
+import trajectory as t
+import spatial_index as s
 import matplotlib.pyplot as plt
 from matplotlib.widgets import Slider
 
@@ -11,7 +14,11 @@ class Environment:
 
     def reset_grid(self):
         self.obstacles = {}
+        self.obstacle_ids = []
+        self.obstacle_states = np.zeros((0, 4), dtype=np.int64)
+        self.spatial_index = None
         self.robot_path = {}
+        self.horizon = int(math.sqrt(math.pow(self.grid_h, 2) + math.pow(self.grid_w, 2)))
 
     def is_inside_grid(self, x, y):
         return -1 < x < self.grid_w and -1 < y < self.grid_h
@@ -29,7 +36,6 @@ class Environment:
             raise ValueError("END CANNOT BE OUTSIDE GRID.")
 
     def set_obstacles(self, obstacles: dict):
-        diagonal = int(math.sqrt(math.pow(self.grid_h, 2) + math.pow(self.grid_w, 2)))
         for obstacle_id in obstacles:
             self.obstacles[obstacle_id] = {
                 'x': obstacles[obstacle_id]['x'],
@@ -38,13 +44,25 @@ class Environment:
                 'dy': obstacles[obstacle_id]['dy'],
                 'major_axis': obstacles[obstacle_id]['major_axis'],
                 'minor_axis': obstacles[obstacle_id]['minor_axis'],
-                'path': {timestep: {'x': obstacles[obstacle_id]['x'] + (timestep * obstacles[obstacle_id]['dx']),
-                                    'y': obstacles[obstacle_id]['y'] + (timestep * obstacles[obstacle_id]['dy']),
-                                    'dx': obstacles[obstacle_id]['dx'],
-                                    'dy': obstacles[obstacle_id]['dy'],
-                                    'speed': math.sqrt(math.pow(obstacles[obstacle_id]['dx'], 2) + math.pow(obstacles[obstacle_id]['dy'], 2)),
-                                    } for timestep in range(diagonal)
-                        },
+                'path': t.Trajectory(obstacles[obstacle_id]['x'], obstacles[obstacle_id]['y'], obstacles[obstacle_id]['dx'], obstacles[obstacle_id]['dy'], self.horizon),
+                }
+        # ONE ROW OF x, y, dx, dy PER OBSTACLE, IN THE ORDER OF obstacle_ids, FOR THE SPATIAL INDEX AND THE RENDERER.
+        self.obstacle_ids = list(self.obstacles)
+        self.obstacle_states = np.array([[self.obstacles[obstacle_id]['x'], self.obstacles[obstacle_id]['y'], self.obstacles[obstacle_id]['dx'], self.obstacles[obstacle_id]['dy']] for obstacle_id in self.obstacle_ids], dtype=np.int64).reshape(-1, 4)
+        self.spatial_index = None
+
+    def get_spatial_index(self):
+        if self.spatial_index is None:
+            self.spatial_index = s.SpatialIndex(self.obstacle_ids, self.obstacle_states)
+        return self.spatial_index
+
+    def get_obstacle(self, obstacle_id, timestep):
+        return {'x': self.obstacles[obstacle_id]['x'] + (timestep * self.obstacles[obstacle_id]['dx']),
+                'y': self.obstacles[obstacle_id]['y'] + (timestep * self.obstacles[obstacle_id]['dy']),
+                'dx': self.obstacles[obstacle_id]['dx'],
+                'dy': self.obstacles[obstacle_id]['dy'],
+                'major_axis': self.obstacles[obstacle_id]['major_axis'],
+                'minor_axis': self.obstacles[obstacle_id]['minor_axis'],
                 }
 
     def get_straight_path(self, start_x: int, start_y: int, end_x: int, end_y: int):
@@ -93,7 +111,9 @@ class Environment:
         plt.pause(pause_time)
         plt.close()
 
-    def simulate(self, pause_time=1.0):
+    def simulate(self, pause_time=1.0, renderer=None, output=None):
+        if renderer is not None:
+            return renderer.simulate(self, pause_time, output)
         for timestep in self.robot_path:
             fig, ax = plt.subplots(1, 1, figsize=(12, 12))
             ax.add_patch(plt.Rectangle((self.start_x, self.start_y), 1, 1, color='green'))
@@ -1,5 +1,7 @@
 import math
+import hashlib
 import node as n
+import numpy as np
 import matplotlib.pyplot as plt
 
 class Grid:
@@ -9,77 +11,175 @@ class Grid:
         self.reset_grid()
 
     def reset_grid(self):
+        # ONE ARRAY PER CELL FIELD, INDEXED [y, x]. AN UNSET k IS STORED AS NaN.
         self.obstacles = {}
-        self.grid = [[n.Node(i, j) for i in range(self.grid_w)] for j in range(self.grid_h)]
+        self.k = np.full((self.grid_h, self.grid_w), np.nan, dtype=np.float64)
+        self.start = np.zeros((self.grid_h, self.grid_w), dtype=bool)
+        self.end = np.zeros((self.grid_h, self.grid_w), dtype=bool)
+        self.obstacle = np.zeros((self.grid_h, self.grid_w), dtype=bool)
+        self.repulsion_factor = np.zeros((self.grid_h, self.grid_w), dtype=np.float32)
+        self.start_distance = np.zeros((self.grid_h, self.grid_w), dtype=np.float64)
+        self.end_distance = np.zeros((self.grid_h, self.grid_w), dtype=np.float64)
+        self.blocked_table = None
+
+    def __getstate__(self):
+        # PICKLES THE BOOLEAN FIELDS AS PACKED BITS AND LEAVES OUT EVERYTHING THAT CAN BE REBUILT (DISTANCES, AN UNTOUCHED k, THE CACHED TABLE), SO GRIDS ARE CHEAP TO SEND TO WORKER PROCESSES.
+        state = dict(self.__dict__)
+        state['blocked_table'] = None
+        state['start_distance'] = None
+        state['end_distance'] = None
+        if np.isnan(self.k).all():
+            state['k'] = None
+        for key in ['start', 'end', 'obstacle']:
+            state[key] = np.packbits(self.__dict__[key])
+        return state
+
+    def __setstate__(self, state):
+        for key in ['start', 'end', 'obstacle']:
+            state[key] = np.unpackbits(state[key], count=state['grid_h'] * state['grid_w']).astype(bool).reshape(state['grid_h'], state['grid_w'])
+        if state['k'] is None:
+            state['k'] = np.full((state['grid_h'], state['grid_w']), np.nan, dtype=np.float64)
+        self.__dict__.update(state)
+        self.start_distance = np.zeros((self.grid_h, self.grid_w), dtype=np.float64)
+        self.end_distance = np.zeros((self.grid_h, self.grid_w), dtype=np.float64)
+        if hasattr(self, 'start_x') and hasattr(self, 'end_x'):
+            self.calculate_distances()
 
     def __getitem__(self, index: list):
         index_x, index_y = index
-        return self.grid[index_y][index_x]
+        return n.NodeView(self, index_x, index_y)
 
     def __setitem__(self, index, value):
         index_x, index_y = index
-        self.grid[index_y][index_x] = value
+        cell = n.NodeView(self, index_x, index_y)
+        for key in ['k', 'start', 'end', 'obstacle', 'repulsion_factor', 'start_distance', 'end_distance']:
+            cell[key] = value[key]
 
     def is_inside_grid(self, x, y):
         return -1 < x < self.grid_w and -1 < y < self.grid_h
 
     def is_free_to_move(self, x, y):
-        return not self.grid[y][x]['obstacle'] and self.grid[y][x]['repulsion_factor'] == 0.0
+        return not self.obstacle[y, x] and self.repulsion_factor[y, x] == 0.0
+
+    def get_blocked_table(self):
+        # SUMMED AREA TABLE OF THE CELLS is_free_to_move REJECTS, REBUILT LAZILY AFTER THE OBSTACLES CHANGE.
+        if self.blocked_table is None:
+            blocked = self.obstacle | (self.repulsion_factor != 0.0)
+            self.blocked_table = np.zeros((self.grid_h + 1, self.grid_w + 1), dtype=np.int64)
+            self.blocked_table[1:, 1:] = blocked.cumsum(axis=0).cumsum(axis=1)
+        return self.blocked_table
+
+    def count_blocked(self, x1, y1, x2, y2):
+        x1, y1, x2, y2 = max(x1, 0), max(y1, 0), min(x2, self.grid_w - 1), min(y2, self.grid_h - 1)
+        if x1 > x2 or y1 > y2:
+            return 0
+        table = self.get_blocked_table()
+        return int(table[y2 + 1, x2 + 1] - table[y1, x2 + 1] - table[y2 + 1, x1] + table[y1, x1])
+
+    def count_blocked_around(self, x, y, distance, movement='queen'):
+        # THE CELL (x, y) ITSELF IS NOT A MOVE, SO IT IS LEFT OUT OF THE COUNT.
+        if movement == 'rook':
+            return self.count_blocked(x - distance, y, x + distance, y) + self.count_blocked(x, y - distance, x, y + distance) - (2 * self.count_blocked(x, y, x, y))
+        return self.count_blocked(x - distance, y - distance, x + distance, y + distance) - self.count_blocked(x, y, x, y)
+
+    def get_snapshot_key(self):
+        # IDENTIFIES THE CURRENT SET OF CELLS is_free_to_move REJECTS, TWO GRIDS WITH THE SAME KEY GIVE THE SAME k FIELD FOR THE SAME END.
+        blocked = self.obstacle | (self.repulsion_factor != 0.0)
+        return self.grid_h, self.grid_w, hashlib.sha1(np.packbits(blocked).tobytes()).hexdigest()
 
     def put_start(self, start_x, start_y):
         if self.is_inside_grid(start_x, start_y):
             self.start_x, self.start_y = start_x, start_y
-            self.grid[start_y][start_x]['start'] = True
+            self.start[start_y, start_x] = True
         else:
             raise ValueError("START CANNOT BE OUTSIDE GRID.")
 
     def put_end(self, end_x, end_y):
         if self.is_inside_grid(end_x, end_y):
             self.end_x, self.end_y = end_x, end_y
-            self.grid[end_y][end_x]['end'] = True
+            self.end[end_y, end_x] = True
         else:
             raise ValueError("END CANNOT BE OUTSIDE GRID.")
 
+    def get_oval_footprint(self, obstacle_x, obstacle_y, obstacle_dx, obstacle_dy, major_axis, minor_axis):
+        # EVERY (major, i, j) COMBINATION OF THE REPULSION OVAL, OVERLAPPING CELLS ARE KEPT SO THEY ADD UP LIKE BEFORE.
+        major = np.arange(major_axis[0], major_axis[1] + 1)
+        minor = np.arange(minor_axis[0], minor_axis[1] + 1)
+        index_x = obstacle_x + (major[:, None, None] * obstacle_dx) + minor[None, :, None]
+        index_y = obstacle_y + (major[:, None, None] * obstacle_dy) + minor[None, None, :]
+        index_x, index_y = np.broadcast_arrays(index_x, index_y)
+        return index_x.ravel(), index_y.ravel()
+
+    def stamp_repulsion(self, index_x, index_y, amount=1.0):
+        self.blocked_table = None
+        inside = (index_x > -1) & (index_x < self.grid_w) & (index_y > -1) & (index_y < self.grid_h)
+        np.add.at(self.repulsion_factor, (index_y[inside], index_x[inside]), amount)
+        return set(zip(index_x[inside].tolist(), index_y[inside].tolist()))
+
     def put_oval_repulsion(self, obstacle_x, obstacle_y, obstacle_dx, obstacle_dy, major_axis, minor_axis):
-        for major in range(major_axis[0], major_axis[1] + 1, 1):
-            center_x, center_y = obstacle_x + major * obstacle_dx, obstacle_y + major * obstacle_dy
-            for i in range(minor_axis[0], minor_axis[1] + 1, 1):
-                for j in range(minor_axis[0], minor_axis[1] + 1, 1):
-                    index_x, index_y = center_x + i, center_y + j
-                    if self.is_inside_grid(index_x, index_y):
-                        self.grid[index_y][index_x]['repulsion_factor'] = self.grid[index_y][index_x]['repulsion_factor'] + 1.0
+        return self.stamp_repulsion(*self.get_oval_footprint(obstacle_x, obstacle_y, obstacle_dx, obstacle_dy, major_axis, minor_axis))
 
     def put_obstacle(self, obstacle_id, obstacle_x, obstacle_y, obstacle_dx, obstacle_dy, major_axis, minor_axis):
+        # RETURNS THE CELLS WHOSE OBSTACLE OR REPULSION CHANGED, Bstar.replan ONLY REPAIRS AROUND THESE.
+        changed_cells = set()
         if self.is_inside_grid(obstacle_x, obstacle_y):
-            self.grid[obstacle_y][obstacle_x]['obstacle'] = True
-            self.grid[obstacle_y][obstacle_x]['obstacle_movement'] = [obstacle_dx, obstacle_dy]
-            self.obstacles[obstacle_id] = {'x': obstacle_x, 'y': obstacle_y, 'dx': obstacle_dx, 'dy': obstacle_dy, 'major_axis': major_axis, 'minor_axis': minor_axis}
-        self.put_oval_repulsion(obstacle_x, obstacle_y, obstacle_dx, obstacle_dy, major_axis, minor_axis)
+            self.obstacle[obstacle_y, obstacle_x] = True
+            changed_cells.add((obstacle_x, obstacle_y))
+        self.obstacles[obstacle_id] = {'x': obstacle_x, 'y': obstacle_y, 'dx': obstacle_dx, 'dy': obstacle_dy, 'major_axis': major_axis, 'minor_axis': minor_axis}
+        return changed_cells | self.put_oval_repulsion(obstacle_x, obstacle_y, obstacle_dx, obstacle_dy, major_axis, minor_axis)
+
+    def put_obstacles(self, obstacles: dict):
+        changed_cells = set()
+        footprints_x, footprints_y = [], []
+        for obstacle_id in obstacles:
+            obstacle = obstacles[obstacle_id]
+            if self.is_inside_grid(obstacle['x'], obstacle['y']):
+                self.obstacle[obstacle['y'], obstacle['x']] = True
+                changed_cells.add((obstacle['x'], obstacle['y']))
+            self.obstacles[obstacle_id] = {'x': obstacle['x'], 'y': obstacle['y'], 'dx': obstacle['dx'], 'dy': obstacle['dy'], 'major_axis': obstacle['major_axis'], 'minor_axis': obstacle['minor_axis']}
+            index_x, index_y = self.get_oval_footprint(obstacle['x'], obstacle['y'], obstacle['dx'], obstacle['dy'], obstacle['major_axis'], obstacle['minor_axis'])
+            footprints_x.append(index_x)
+            footprints_y.append(index_y)
+        if len(footprints_x) > 0:
+            changed_cells = changed_cells | self.stamp_repulsion(np.concatenate(footprints_x), np.concatenate(footprints_y))
+        return changed_cells
+
+    def remove_obstacle(self, obstacle_id):
+        if obstacle_id not in self.obstacles:
+            raise KeyError(f"OBSTACLE {obstacle_id} IS NOT IN GRID.")
+        obstacle = self.obstacles.pop(obstacle_id)
+        changed_cells = set()
+        if self.is_inside_grid(obstacle['x'], obstacle['y']):
+            self.obstacle[obstacle['y'], obstacle['x']] = any([other['x'] == obstacle['x'] and other['y'] == obstacle['y'] for other in self.obstacles.values()])
+            changed_cells.add((obstacle['x'], obstacle['y']))
+        index_x, index_y = self.get_oval_footprint(obstacle['x'], obstacle['y'], obstacle['dx'], obstacle['dy'], obstacle['major_axis'], obstacle['minor_axis'])
+        return changed_cells | self.stamp_repulsion(index_x, index_y, -1.0)
 
     def euclidian_distance(self, x1, y1, x2, y2):
         return math.sqrt(math.pow(x2 - x1, 2) + math.pow(y2 - y1, 2))
 
     def calculate_distances(self):
-        for i in range(self.grid_h):
-            for j in range(self.grid_w):
-                self.grid[i][j]['start_distance'] = self.euclidian_distance(self.start_x, self.start_y, j, i)
-                self.grid[i][j]['end_distance'] = self.euclidian_distance(self.end_x, self.end_y, j, i)
+        index_y, index_x = np.indices((self.grid_h, self.grid_w))
+        self.start_distance = np.sqrt(np.square(index_x - self.start_x) + np.square(index_y - self.start_y))
+        self.end_distance = np.sqrt(np.square(index_x - self.end_x) + np.square(index_y - self.end_y))
 
-    def plot_grid(self, robot_path=None, pause_time=1.0, text=True):
+    def plot_grid(self, robot_path=None, pause_time=1.0, text=True, renderer=None, output=None):
+        if renderer is not None:
+            return renderer.draw_grid(self, robot_path, pause_time, text, output)
         fig, ax = plt.subplots(1, 1, figsize=(12, 12))
         for i in range(self.grid_h):
             for j in range(self.grid_w):
-                if self.grid[i][j]['start']:
+                if self.start[i, j]:
                     ax.add_patch(plt.Rectangle((j, i), 1, 1, color='green'))
-                elif self.grid[i][j]['end']:
+                elif self.end[i, j]:
                     ax.add_patch(plt.Rectangle((j, i), 1, 1, color='red'))
-                elif self.grid[i][j]['obstacle']:
+                elif self.obstacle[i, j]:
                     ax.add_patch(plt.Rectangle((j, i), 1, 1, color='black'))
-                elif self.grid[i][j]['repulsion_factor'] > 0.0:
+                elif self.repulsion_factor[i, j] > 0.0:
                     ax.add_patch(plt.Rectangle((j, i), 1, 1, color='grey'))
                 if text:
-                    ax.text(j + 0.5, i + 0.3, f'{round(self.grid[i][j]["k"], 1) if self.grid[i][j]["k"] is not None else ""}', horizontalalignment='center', verticalalignment='center', color='black')
-                    ax.text(j + 0.5, i + 0.8, f'{round(self.grid[i][j]["repulsion_factor"], 1) if self.grid[i][j]["repulsion_factor"] > 0.0 else ""}', horizontalalignment='center', verticalalignment='center', color='black')
+                    ax.text(j + 0.5, i + 0.3, f'{round(float(self.k[i, j]), 1) if not np.isnan(self.k[i, j]) else ""}', horizontalalignment='center', verticalalignment='center', color='black')
+                    ax.text(j + 0.5, i + 0.8, f'{round(float(self.repulsion_factor[i, j]), 1) if self.repulsion_factor[i, j] > 0.0 else ""}', horizontalalignment='center', verticalalignment='center', color='black')
         if robot_path is not None:
             ax.plot([robot_path[timestep]['x'] + 0.5 for timestep in robot_path], [robot_path[timestep]['y'] + 0.5 for timestep in robot_path], label=f'ROBOT PATH')
             ax.scatter([robot_path[timestep]['x'] + 0.5 for timestep in robot_path], [robot_path[timestep]['y'] + 0.5 for timestep in robot_path], label=f'ROBOT PATH')
@@ -0,0 +1,210 @@
+import math
+import heapq
+import grid as g
+import numpy as np
+import bstar as b
+
+class HierarchicalPlanner:
+    # HPA* STYLE PLANNING. THE GRID IS CUT INTO cluster_size x cluster_size CLUSTERS, NEIGHBOURING CLUSTERS ARE JOINED THROUGH ONE TRANSITION PER FREE RUN OF THEIR SHARED BORDER,
+    # A COARSE ROUTE IS FOUND OVER THE TRANSITIONS AND REFINED WITH Bstar INSIDE THE CORRIDOR OF CLUSTERS IT PASSES THROUGH, window_clusters x window_clusters CLUSTERS AT A TIME.
+    # BORDERS AND CLUSTER EDGES ARE BUILT THE FIRST TIME A SEARCH REACHES THEM, SO ONLY THE PART OF A LARGE MAP AROUND THE ROUTE IS EVER LOOKED AT.
+    def __init__(self, occupancy_grid, obstacle_penalty, cluster_size=16, movement='queen', window_clusters=4):
+        self.occupancy_grid = occupancy_grid
+        self.obstacle_penalty = obstacle_penalty
+        self.cluster_size = cluster_size
+        self.movement = movement
+        self.window_clusters = window_clusters
+        self.cluster_h = math.ceil(occupancy_grid.grid_h / cluster_size)
+        self.cluster_w = math.ceil(occupancy_grid.grid_w / cluster_size)
+        # (cluster, cluster) -> [(cell, cell)] TRANSITIONS, ORIENTED FROM THE FIRST CLUSTER OF THE KEY TO THE SECOND.
+        self.borders = {}
+        # cluster -> {cell: [(cell, cost)]} COSTS BETWEEN THE TRANSITIONS OF ONE CLUSTER.
+        self.cluster_edges = {}
+
+    def get_cluster(self, x, y):
+        return x // self.cluster_size, y // self.cluster_size
+
+    def get_cluster_bounds(self, cluster):
+        cluster_x, cluster_y = cluster
+        x1, y1 = cluster_x * self.cluster_size, cluster_y * self.cluster_size
+        return x1, y1, min(x1 + self.cluster_size, self.occupancy_grid.grid_w), min(y1 + self.cluster_size, self.occupancy_grid.grid_h)
+
+    def get_neighbour_clusters(self, cluster):
+        cluster_x, cluster_y = cluster
+        return [(cluster_x + dx, cluster_y + dy) for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)] if -1 < cluster_x + dx < self.cluster_w and -1 < cluster_y + dy < self.cluster_h]
+
+    def get_border(self, cluster, neighbour):
+        key = (min(cluster, neighbour), max(cluster, neighbour))
+        if key not in self.borders:
+            (first_x, first_y), (second_x, second_y) = key
+            x1, y1, x2, y2 = self.get_cluster_bounds(key[0])
+            if second_x > first_x:
+                side_x, side_y = np.full(y2 - y1, x2 - 1), np.arange(y1, y2)
+                dx, dy = 1, 0
+            else:
+                side_x, side_y = np.arange(x1, x2), np.full(x2 - x1, y2 - 1)
+                dx, dy = 0, 1
+            free = (~self.occupancy_grid.obstacle[side_y, side_x]) & (self.occupancy_grid.repulsion_factor[side_y, side_x] == 0.0)
+            free = free & (~self.occupancy_grid.obstacle[side_y + dy, side_x + dx]) & (self.occupancy_grid.repulsion_factor[side_y + dy, side_x + dx] == 0.0)
+            # ONE TRANSITION IN THE MIDDLE OF EVERY RUN OF CELLS THAT ARE FREE ON BOTH SIDES.
+            edges = np.diff(np.concatenate([[0], free.astype(np.int8), [0]]))
+            transitions = []
+            for run_start, run_end in zip(np.nonzero(edges == 1)[0], np.nonzero(edges == -1)[0]):
+                middle = (run_start + run_end - 1) // 2
+                transitions.append(((int(side_x[middle]), int(side_y[middle])), (int(side_x[middle]) + dx, int(side_y[middle]) + dy)))
+            self.borders[key] = transitions
+        if key[0] == cluster:
+            return self.borders[key]
+        return [(second, first) for first, second in self.borders[key]]
+
+    def get_corridor_grid(self, clusters, start_x, start_y, end_x, end_y):
+        # A GRID OVER THE BOUNDING BOX OF clusters WHERE EVERY CELL OUTSIDE THEM IS AN OBSTACLE, start AND end ARE IN FULL GRID COORDINATES. RETURNS THE GRID AND ITS OFFSET.
+        bounds = [self.get_cluster_bounds(cluster) for cluster in clusters]
+        x1, y1 = min([bound[0] for bound in bounds]), min([bound[1] for bound in bounds])
+        x2, y2 = max([bound[2] for bound in bounds]), max([bound[3] for bound in bounds])
+        corridor_grid = g.Grid(y2 - y1, x2 - x1)
+        corridor_grid.obstacle[:, :] = True
+        for cluster_x1, cluster_y1, cluster_x2, cluster_y2 in bounds:
+            corridor_grid.obstacle[cluster_y1 - y1:cluster_y2 - y1, cluster_x1 - x1:cluster_x2 - x1] = self.occupancy_grid.obstacle[cluster_y1:cluster_y2, cluster_x1:cluster_x2]
+            corridor_grid.repulsion_factor[cluster_y1 - y1:cluster_y2 - y1, cluster_x1 - x1:cluster_x2 - x1] = self.occupancy_grid.repulsion_factor[cluster_y1:cluster_y2, cluster_x1:cluster_x2]
+        corridor_grid.put_start(start_x - x1, start_y - y1)
+        corridor_grid.put_end(end_x - x1, end_y - y1)
+        corridor_grid.calculate_distances()
+        return corridor_grid, x1, y1
+
+    def get_cluster_grid(self, cluster, start_x, start_y, end_x, end_y):
+        # A GRID HOLDING ONLY THE CLUSTER, start AND end ARE IN FULL GRID COORDINATES.
+        return self.get_corridor_grid([cluster], start_x, start_y, end_x, end_y)[0]
+
+    def get_costs_from(self, cluster, x, y, cells):
+        # COST FROM (x, y) TO EVERY REACHABLE CELL OF cells WITHOUT LEAVING THE CLUSTER. MOVES ARE SYMMETRIC SO A COST FIELD TOWARDS (x, y) GIVES THE SAME NUMBERS.
+        x1, y1, x2, y2 = self.get_cluster_bounds(cluster)
+        field = b.Bstar(self.get_cluster_grid(cluster, x, y, x, y), self.obstacle_penalty).find_cost_field(self.movement)
+        costs = []
+        for cell_x, cell_y in cells:
+            cost = field[cell_y - y1, cell_x - x1]
+            if (cell_x, cell_y) != (x, y) and not np.isnan(cost) and self.occupancy_grid.is_free_to_move(cell_x, cell_y):
+                costs.append(((cell_x, cell_y), float(cost)))
+        return costs
+
+    def get_cluster_nodes(self, cluster):
+        return list(dict.fromkeys([first for neighbour in self.get_neighbour_clusters(cluster) for first, second in self.get_border(cluster, neighbour)]))
+
+    def get_cluster_edges(self, cluster):
+        if cluster not in self.cluster_edges:
+            nodes = self.get_cluster_nodes(cluster)
+            self.cluster_edges[cluster] = {node: self.get_costs_from(cluster, node[0], node[1], nodes) for node in nodes}
+        return self.cluster_edges[cluster]
+
+    def build(self):
+        # BUILDS EVERY BORDER AND CLUSTER UP FRONT INSTEAD OF WAITING FOR SEARCHES TO REACH THEM.
+        for cluster_y in range(self.cluster_h):
+            for cluster_x in range(self.cluster_w):
+                self.get_cluster_edges((cluster_x, cluster_y))
+
+    def update(self, changed_cells):
+        # ONLY THE CLUSTERS HOLDING A CHANGED CELL ARE DROPPED, PLUS A NEIGHBOUR WHEN THE TRANSITIONS ON THEIR SHARED BORDER MOVED. RETURNS THE DROPPED CLUSTERS.
+        touched = {self.get_cluster(x, y) for x, y in changed_cells}
+        dropped = set(touched)
+        for cluster in touched:
+            self.cluster_edges.pop(cluster, None)
+            for neighbour in self.get_neighbour_clusters(cluster):
+                key = (min(cluster, neighbour), max(cluster, neighbour))
+                if key in self.borders:
+                    transitions = self.borders.pop(key)
+                    if self.get_border(key[0], key[1]) != transitions and neighbour in self.cluster_edges:
+                        self.cluster_edges.pop(neighbour)
+                        dropped.add(neighbour)
+        return dropped
+
+    def get_abstract_neighbours(self, node, extra_edges):
+        cluster = self.get_cluster(node[0], node[1])
+        neighbours = list(self.get_cluster_edges(cluster).get(node, [])) + extra_edges.get(node, [])
+        for neighbour in self.get_neighbour_clusters(cluster):
+            neighbours = neighbours + [(second, 1.0) for first, second in self.get_border(cluster, neighbour) if first == node]
+        return neighbours
+
+    def find_abstract_path(self, start_x, start_y, end_x, end_y):
+        # A* OVER THE TRANSITIONS WITH start AND end JOINED TO THE TRANSITIONS OF THEIR OWN CLUSTERS FOR THIS SEARCH ONLY.
+        start, end = (start_x, start_y), (end_x, end_y)
+        start_cluster, end_cluster = self.get_cluster(start_x, start_y), self.get_cluster(end_x, end_y)
+        extra_edges = {start: self.get_costs_from(start_cluster, start_x, start_y, self.get_cluster_nodes(start_cluster))}
+        end_nodes = self.get_cluster_nodes(end_cluster)
+        if start_cluster == end_cluster:
+            end_nodes = end_nodes + [start]
+        for node, cost in self.get_costs_from(end_cluster, end_x, end_y, end_nodes):
+            extra_edges.setdefault(node, []).append((end, cost))
+        costs = {start: 0.0}
+        parents = {start: None}
+        open_list = [(math.dist(start, end), 0, start)]
+        push_count = 0
+        while len(open_list) > 0:
+            priority, count, node = heapq.heappop(open_list)
+            if node == end:
+                abstract_path = []
+                while node is not None:
+                    abstract_path.append(node)
+                    node = parents[node]
+                return abstract_path[::-1]
+            if priority > costs[node] + math.dist(node, end):
+                continue
+            for neighbour, cost in self.get_abstract_neighbours(node, extra_edges):
+                if neighbour not in costs or costs[node] + cost < costs[neighbour]:
+                    costs[neighbour] = costs[node] + cost
+                    parents[neighbour] = node
+                    push_count = push_count + 1
+                    heapq.heappush(open_list, (costs[neighbour] + math.dist(neighbour, end), push_count, neighbour))
+        return None
+
+    def is_in_window(self, cells):
+        cluster_x, cluster_y = zip(*[self.get_cluster(x, y) for x, y in cells])
+        return max(cluster_x) - min(cluster_x) < self.window_clusters and max(cluster_y) - min(cluster_y) < self.window_clusters
+
+    def refine(self, cells, max_speed=1, k_factor=0.5):
+        # ONE Bstar SEARCH FROM THE FIRST TO THE LAST OF cells, ALLOWED ONLY INSIDE THE CLUSTERS THEY TOUCH. RETURNS THE CELLS OF THE PATH OR None.
+        corridor_grid, offset_x, offset_y = self.get_corridor_grid(list(dict.fromkeys([self.get_cluster(x, y) for x, y in cells])), cells[0][0], cells[0][1], cells[-1][0], cells[-1][1])
+        path = b.Bstar(corridor_grid, self.obstacle_penalty).find_path(self.movement, max_speed, k_factor)
+        if path is None:
+            return None
+        return [(path[timestep]['x'] + offset_x, path[timestep]['y'] + offset_y) for timestep in path]
+
+    def get_cost(self, cells):
+        return sum([math.dist(first, second) for first, second in zip(cells[:-1], cells[1:])])
+
+    def find_path(self, max_speed=1, k_factor=0.5):
+        # SAME PATH FORMAT AS Bstar.find_path, None WHEN THE COARSE SEARCH FINDS NO ROUTE OR THE CORRIDOR CANNOT BE REFINED.
+        if not self.occupancy_grid.is_inside_grid(self.occupancy_grid.start_x, self.occupancy_grid.start_y):
+            raise ValueError("START CANNOT BE OUTSIDE GRID.")
+        abstract_path = self.find_abstract_path(self.occupancy_grid.start_x, self.occupancy_grid.start_y, self.occupancy_grid.end_x, self.occupancy_grid.end_y)
+        if abstract_path is None:
+            return None
+        # THE ROUTE IS CUT INTO WINDOWS OF TRANSITIONS THAT FIT window_clusters x window_clusters CLUSTERS AND EACH WINDOW IS ONE SEARCH OVER ITS CORRIDOR.
+        # THE COARSE COSTS ARE CHEAPER TO GET THAN A REFINED PATH, SO A WINDOW CAN STILL FAIL (A START IN A REPULSION ZONE, OR EDGES LEFT FROM BEFORE AN update).
+        cells = [abstract_path[0]]
+        joins = [0]
+        first = 0
+        while first < len(abstract_path) - 1:
+            last = first + 1
+            while last + 1 < len(abstract_path) and self.is_in_window(abstract_path[first:last + 2]):
+                last = last + 1
+            window = self.refine(abstract_path[first:last + 1], max_speed, k_factor)
+            if window is None:
+                return None
+            cells = cells + window[1:]
+            joins.append(len(cells) - 1)
+            first = last
+        # SMOOTHING: THE PATH BENDS WHERE TWO WINDOWS MEET, SO THE STRETCH FROM HALFWAY THROUGH ONE WINDOW TO HALFWAY THROUGH THE NEXT IS SEARCHED AGAIN AND KEPT WHEN CHEAPER.
+        # THE STRETCHES DO NOT OVERLAP AND ARE REPLACED FROM THE END, SO THE INDICES OF THE EARLIER ONES STAY VALID.
+        for before, join, after in reversed(list(zip(joins[:-2], joins[1:-1], joins[2:]))):
+            stretch = cells[(before + join) // 2:(join + after) // 2 + 1]
+            smoothed = self.refine(stretch, max_speed, k_factor)
+            if smoothed is not None and self.get_cost(smoothed) < self.get_cost(stretch):
+                cells = cells[:(before + join) // 2] + smoothed + cells[(join + after) // 2 + 1:]
+        path = {}
+        for timestep, (x, y) in enumerate(cells):
+            path[timestep] = {'x': x, 'y': y, 'dx': 0, 'dy': 0, 'speed': 0.0}
+            if timestep > 0:
+                path[timestep - 1]['dx'] = x - path[timestep - 1]['x']
+                path[timestep - 1]['dy'] = y - path[timestep - 1]['y']
+                path[timestep - 1]['speed'] = math.sqrt(math.pow(path[timestep - 1]['dx'], 2) + math.pow(path[timestep - 1]['dy'], 2))
+        return path
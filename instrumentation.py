@@ -0,0 +1,35 @@
+import time
+
+class Instrumentation:
+    # PASSED TO Bstar AND Perception TO COLLECT COUNTERS AND PHASE TIMES. PLANNERS WITHOUT ONE SKIP ALL OF THIS BEHIND A SINGLE None CHECK.
+    # on_expand(planner, x, y) RUNS FOR EVERY EXPANDED CELL AND on_search_done(planner) ONCE THE k FIELD IS READY, E.G. TO CALL plot_grid.
+    def __init__(self, on_expand=None, on_search_done=None):
+        self.on_expand = on_expand
+        self.on_search_done = on_search_done
+        self.reset()
+
+    def reset(self):
+        self.counters = {}
+        self.timers = {}
+        self.started = {}
+
+    def count(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def start_timer(self, name):
+        self.started[name] = time.perf_counter()
+
+    def stop_timer(self, name):
+        self.timers[name] = self.timers.get(name, 0.0) + (time.perf_counter() - self.started.pop(name))
+
+    def expanded(self, planner, x, y):
+        self.count('expansions')
+        if self.on_expand is not None:
+            self.on_expand(planner, x, y)
+
+    def search_done(self, planner):
+        if self.on_search_done is not None:
+            self.on_search_done(planner)
+
+    def get_report(self):
+        return {'counters': dict(self.counters), 'timers': dict(self.timers)}
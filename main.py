@@ -14,6 +14,7 @@ OBSTACLE_PENALTY = 500
 MOVEMENT = 'queen'
 MAX_SPEED = 4
 K_FACTOR = 0.5
+SPACE_TIME = False
 
 environment = e.Environment(GRID_H, GRID_W)
 watcher = p.Perception(environment)
@@ -24,14 +25,31 @@ environment.set_obstacles(OBSTACLES)
 environment.set_global_path()
 environment.plot_environment(pause_time=5.0)
 
-watcher.get_obstacles()
-while len(watcher.obstacles) > 0:
-    occupancy_grid = watcher.get_occupancy_grid()
-    occupancy_grid.plot_grid(pause_time=5.0)
+if SPACE_TIME:
+    occupancy_grid = watcher.get_occupancy_grid({})
     planner = b.Bstar(occupancy_grid, OBSTACLE_PENALTY)
-    path = planner.find_path(MOVEMENT, MAX_SPEED, K_FACTOR)
+    path = planner.find_timed_path(watcher.get_reservation_table(occupancy_grid), MOVEMENT, MAX_SPEED, K_FACTOR)
+    if path is None:
+        raise ValueError("NO COLLISION FREE PATH WITHIN THE OBSTACLE HORIZON.")
     print(path)
     occupancy_grid.plot_grid(path, pause_time=10.0, text=False)
-    watcher.get_obstacles(path)
+else:
+    watcher.get_obstacles()
+    planner = None
+    while len(watcher.obstacles) > 0:
+        if planner is None:
+            occupancy_grid = watcher.get_occupancy_grid()
+            occupancy_grid.plot_grid(pause_time=5.0)
+            planner = b.Bstar(occupancy_grid, OBSTACLE_PENALTY)
+            path = planner.find_path(MOVEMENT, MAX_SPEED, K_FACTOR)
+        else:
+            changed_cells = watcher.update_occupancy_grid(occupancy_grid)
+            occupancy_grid.plot_grid(pause_time=5.0)
+            path = planner.replan(changed_cells, MOVEMENT, MAX_SPEED, K_FACTOR)
+        if path is None:
+            raise ValueError("NO PATH FROM START TO END.")
+        print(path)
+        occupancy_grid.plot_grid(path, pause_time=10.0, text=False)
+        watcher.get_obstacles(path)
 environment.set_path(path)
 environment.simulate(pause_time=2.0)
@@ -0,0 +1,95 @@
+import json
+import grid as g
+import numpy as np
+
+MAGIC = b'BSTARMAP'
+VERSION = 1
+ALIGNMENT = 64
+FIELDS = {'obstacle': np.bool_, 'repulsion_factor': np.float32, 'k': np.float64, 'start_distance': np.float64, 'end_distance': np.float64}
+
+class MapFile:
+    # LAYOUT: MAGIC, uint32 VERSION, uint32 HEADER LENGTH, A JSON HEADER, THEN EVERY SAVED FIELD AS A RAW C ORDER [y, x] ARRAY STARTING ON A 64 BYTE BOUNDARY.
+    # THE HEADER HOLDS THE GRID SIZE, START, END, THE OBSTACLE DICT AND THE dtype AND OFFSET OF EVERY SAVED FIELD.
+    def __init__(self, path):
+        self.path = path
+
+    def align(self, size):
+        return -(-size // ALIGNMENT) * ALIGNMENT
+
+    def is_storable_id(self, obstacle_id):
+        # JSON KEEPS str AND int IDS AS THEY ARE, TUPLES COME BACK AS LISTS AND load TURNS THEM BACK INTO TUPLES.
+        if isinstance(obstacle_id, tuple):
+            return all([self.is_storable_id(part) for part in obstacle_id])
+        return isinstance(obstacle_id, (str, int, np.integer))
+
+    def decode_id(self, obstacle_id):
+        if isinstance(obstacle_id, list):
+            return tuple([self.decode_id(part) for part in obstacle_id])
+        return obstacle_id
+
+    def save(self, occupancy_grid, fields=('obstacle', 'repulsion_factor', 'k')):
+        for obstacle_id in occupancy_grid.obstacles:
+            if not self.is_storable_id(obstacle_id):
+                raise ValueError(f"OBSTACLE ID {obstacle_id!r} CANNOT BE STORED IN A MAP FILE, USE str, int OR TUPLES OF THEM.")
+        header = {'grid_h': occupancy_grid.grid_h, 'grid_w': occupancy_grid.grid_w,
+                  'start': [occupancy_grid.start_x, occupancy_grid.start_y] if hasattr(occupancy_grid, 'start_x') else None,
+                  'end': [occupancy_grid.end_x, occupancy_grid.end_y] if hasattr(occupancy_grid, 'end_x') else None,
+                  'obstacles': [[obstacle_id, occupancy_grid.obstacles[obstacle_id]] for obstacle_id in occupancy_grid.obstacles],
+                  'fields': {}}
+        offset = 0
+        for name in fields:
+            if name not in FIELDS:
+                raise ValueError(f"UNKNOWN MAP FIELD {name}.")
+            dtype = np.dtype(FIELDS[name])
+            header['fields'][name] = {'dtype': dtype.str, 'offset': offset}
+            offset = offset + self.align(occupancy_grid.grid_h * occupancy_grid.grid_w * dtype.itemsize)
+        header_bytes = json.dumps(header, default=lambda value: value.tolist()).encode()
+        data_start = self.align(len(MAGIC) + 8 + len(header_bytes))
+        with open(self.path, 'wb') as file:
+            file.write(MAGIC)
+            file.write(np.array([VERSION, len(header_bytes)], dtype='<u4').tobytes())
+            file.write(header_bytes)
+            for name in header['fields']:
+                file.seek(data_start + header['fields'][name]['offset'])
+                np.ascontiguousarray(getattr(occupancy_grid, name), dtype=header['fields'][name]['dtype']).tofile(file)
+            file.truncate(data_start + offset)
+
+    def read_header(self):
+        with open(self.path, 'rb') as file:
+            if file.read(len(MAGIC)) != MAGIC:
+                raise ValueError("NOT A BSTAR MAP FILE.")
+            version, header_length = np.frombuffer(file.read(8), dtype='<u4').tolist()
+            if version != VERSION:
+                raise ValueError(f"UNSUPPORTED MAP FILE VERSION {version}.")
+            header = json.loads(file.read(header_length))
+        header['data_start'] = self.align(len(MAGIC) + 8 + header_length)
+        return header
+
+    def load(self, mode='c'):
+        # SAVED FIELDS ARE MEMORY MAPPED, NOT READ. mode='c' IS COPY ON WRITE SO PLANNERS CAN STILL WRITE k WHILE EVERY PROCESS SHARES THE UNTOUCHED PAGES.
+        # mode='r' MAPS THE FIELDS READ ONLY EXCEPT k, WHICH EVERY SEARCH WRITES AND SO IS READ INTO A PRIVATE COPY. MOVING OBSTACLES ON THE GRID NEEDS mode='c'.
+        header = self.read_header()
+        grid_h, grid_w = header['grid_h'], header['grid_w']
+        # Grid.__init__ WOULD ALLOCATE AND FILL EVERY FIELD, SO THE GRID IS ASSEMBLED HERE THE SAME WAY __setstate__ DOES IT.
+        occupancy_grid = g.Grid.__new__(g.Grid)
+        occupancy_grid.grid_h, occupancy_grid.grid_w = grid_h, grid_w
+        occupancy_grid.obstacles = {self.decode_id(obstacle_id): obstacle for obstacle_id, obstacle in header['obstacles']}
+        occupancy_grid.blocked_table = None
+        for name in FIELDS:
+            if name in header['fields']:
+                setattr(occupancy_grid, name, np.memmap(self.path, dtype=header['fields'][name]['dtype'], mode=mode, offset=header['data_start'] + header['fields'][name]['offset'], shape=(grid_h, grid_w)))
+                if name == 'k' and mode == 'r':
+                    occupancy_grid.k = np.array(occupancy_grid.k)
+            elif name == 'k':
+                occupancy_grid.k = np.full((grid_h, grid_w), np.nan, dtype=np.float64)
+            else:
+                setattr(occupancy_grid, name, np.zeros((grid_h, grid_w), dtype=FIELDS[name]))
+        occupancy_grid.start = np.zeros((grid_h, grid_w), dtype=bool)
+        occupancy_grid.end = np.zeros((grid_h, grid_w), dtype=bool)
+        if header['start'] is not None:
+            occupancy_grid.put_start(*header['start'])
+        if header['end'] is not None:
+            occupancy_grid.put_end(*header['end'])
+        if header['start'] is not None and header['end'] is not None and ('start_distance' not in header['fields'] or 'end_distance' not in header['fields']):
+            occupancy_grid.calculate_distances()
+        return occupancy_grid
@@ -1,15 +1,9 @@
-class Node:
-    def __init__(self, x, y, k=None, start=None, start_distance=0.0, robot=None, end=None, end_distance=0.0, obstacle=None, repulsion_factor=0.0):
+class NodeView:
+    # A CELL OF AN ARRAY BACKED GRID, READS AND WRITES GO STRAIGHT TO THE GRID'S ARRAYS.
+    def __init__(self, grid, x, y):
+        self.grid = grid
         self.x = x
         self.y = y
-        self.k = k
-        self.start = start
-        self.start_distance = start_distance
-        self.robot = robot
-        self.end = end
-        self.end_distance = end_distance
-        self.obstacle = obstacle
-        self.repulsion_factor = repulsion_factor
 
     def __getitem__(self, key):
         if key == 'x':
@@ -17,40 +11,19 @@ class Node:
         elif key == 'y':
             return self.y
         elif key == 'k':
-            return self.k
-        elif key == 'start':
-            return self.start
-        elif key == 'start_distance':
-            return self.start_distance
-        elif key == 'robot':
-            return self.robot
-        elif key == 'end':
-            return self.end
-        elif key == 'end_distance':
-            return self.end_distance
-        elif key == 'obstacle':
-            return self.obstacle
-        elif key == 'repulsion_factor':
-            return self.repulsion_factor
+            k = self.grid.k[self.y, self.x]
+            return None if k != k else float(k)
+        elif key in ('start', 'end', 'obstacle'):
+            return bool(getattr(self.grid, key)[self.y, self.x])
+        elif key in ('start_distance', 'end_distance', 'repulsion_factor'):
+            return float(getattr(self.grid, key)[self.y, self.x])
 
     def __setitem__(self, key, value):
-        if key == 'x':
-            self.x = value
-        elif key == 'y':
-            self.y = value
-        elif key == 'k':
-            self.k = value
-        elif key == 'start':
-            self.start = value
-        elif key == 'start_distance':
-            self.start_distance = value
-        elif key == 'robot':
-            self.robot = value
-        elif key == 'end':
-            self.end = value
-        elif key == 'end_distance':
-            self.end_distance = value
-        elif key == 'obstacle':
-            self.obstacle = value
-        elif key == 'repulsion_factor':
-            self.repulsion_factor = value
+        if key == 'k':
+            self.grid.k[self.y, self.x] = float('nan') if value is None else value
+        elif key in ('start', 'end', 'obstacle'):
+            getattr(self.grid, key)[self.y, self.x] = bool(value)
+        elif key in ('start_distance', 'end_distance', 'repulsion_factor'):
+            getattr(self.grid, key)[self.y, self.x] = value
+        if key in ('obstacle', 'repulsion_factor'):
+            self.grid.blocked_table = None
@@ -0,0 +1,17 @@
+import asyncio
+
+class ObstacleFeed:
+    # SIMULATED SENSOR FOR TESTING A PlannerService WITHOUT HARDWARE. EVERY tick_time THE OBSTACLES OF AN Environment MOVE ONE TIMESTEP ALONG THEIR TRAJECTORIES
+    # AND ARE SENT ONE UPDATE PER OBSTACLE, SO EVERY TICK IS A BURST THE SERVICE HAS TO COALESCE.
+    def __init__(self, environment, service, tick_time=0.1, timesteps=None):
+        self.environment = environment
+        self.service = service
+        self.tick_time = tick_time
+        self.timesteps = environment.horizon if timesteps is None else timesteps
+
+    async def run(self):
+        self.service.set_goal(self.environment.start_x, self.environment.start_y, self.environment.end_x, self.environment.end_y)
+        for timestep in range(self.timesteps):
+            for obstacle_id in self.environment.obstacle_ids:
+                self.service.put_obstacles({obstacle_id: self.environment.get_obstacle(obstacle_id, timestep)})
+            await asyncio.sleep(self.tick_time)
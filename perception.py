@@ -1,56 +1,91 @@
 import grid as g
+import numpy as np
+import reservation as r
 
 class Perception:
-    def __init__(self, environment):
+    def __init__(self, environment, instrumentation=None):
         self.environment = environment
+        self.instrumentation = instrumentation
 
     def get_obstacles(self, path=None):
         if path is None:
             path = self.environment.robot_path
+        if self.instrumentation is not None:
+            self.instrumentation.start_timer('get_obstacles')
+        self.obstacles = {}
+        spatial_index = self.environment.get_spatial_index()
         for timestep in path:
-            self.obstacles = {}
-            colliding_obstacles = {obstacle_id: {
-                'x': self.environment.obstacles[obstacle_id]['path'][timestep]['x'],
-                'y': self.environment.obstacles[obstacle_id]['path'][timestep]['y'],
-                'dx': self.environment.obstacles[obstacle_id]['path'][timestep]['dx'],
-                'dy': self.environment.obstacles[obstacle_id]['path'][timestep]['dy'],
-                'major_axis': self.environment.obstacles[obstacle_id]['major_axis'],
-                'minor_axis': self.environment.obstacles[obstacle_id]['minor_axis'],
-                } for obstacle_id in self.environment.obstacles if self.environment.obstacles[obstacle_id]['path'][timestep]['x'] == path[timestep]['x'] and self.environment.obstacles[obstacle_id]['path'][timestep]['y'] == path[timestep]['y']
-            }
-            other_obstacles = {obstacle_id: {
-                'x': self.environment.obstacles[obstacle_id]['path'][timestep]['x'],
-                'y': self.environment.obstacles[obstacle_id]['path'][timestep]['y'],
-                'dx': self.environment.obstacles[obstacle_id]['path'][timestep]['dx'],
-                'dy': self.environment.obstacles[obstacle_id]['path'][timestep]['dy'],
-                'major_axis': self.environment.obstacles[obstacle_id]['major_axis'],
-                'minor_axis': self.environment.obstacles[obstacle_id]['minor_axis'],
-                } for obstacle_id in self.environment.obstacles if obstacle_id not in colliding_obstacles
-            }
-            if len(colliding_obstacles) > 0:
+            colliding_ids = spatial_index.query(path[timestep]['x'], path[timestep]['y'], timestep)
+            if self.instrumentation is not None:
+                self.instrumentation.count('collision_queries')
+            if len(colliding_ids) > 0:
+                colliding_obstacles = {obstacle_id: self.environment.get_obstacle(obstacle_id, timestep) for obstacle_id in colliding_ids}
+                other_obstacles = {obstacle_id: self.environment.get_obstacle(obstacle_id, timestep) for obstacle_id in self.environment.obstacle_ids if obstacle_id not in colliding_obstacles}
                 self.obstacles[timestep] = {'colliding': colliding_obstacles, 'other': other_obstacles}
                 break
+        if self.instrumentation is not None:
+            self.instrumentation.stop_timer('get_obstacles')
 
-    def get_occupancy_grid(self):
+    def get_corridor(self, path, corridor_width):
+        # CELLS WITHIN corridor_width (CHEBYSHEV) OF ANY CELL OF path, AS A BOOLEAN [y, x] MASK.
+        grid_h, grid_w = self.environment.grid_h, self.environment.grid_w
+        marks = np.zeros((grid_h + 1, grid_w + 1), dtype=np.int64)
+        cells = [(path[timestep]['x'], path[timestep]['y']) for timestep in path if self.environment.is_inside_grid(path[timestep]['x'], path[timestep]['y'])]
+        for x, y in cells:
+            marks[y + 1, x + 1] = 1
+        table = marks.cumsum(axis=0).cumsum(axis=1)
+        index_y, index_x = np.indices((grid_h, grid_w))
+        y1, y2 = np.clip(index_y - corridor_width, 0, grid_h - 1), np.clip(index_y + corridor_width, 0, grid_h - 1)
+        x1, x2 = np.clip(index_x - corridor_width, 0, grid_w - 1), np.clip(index_x + corridor_width, 0, grid_w - 1)
+        return (table[y2 + 1, x2 + 1] - table[y1, x2 + 1] - table[y2 + 1, x1] + table[y1, x1]) > 0
+
+    def get_occupancy_grid(self, obstacles=None, path=None, corridor_width=None):
+        # WITH path AND corridor_width, ONLY OBSTACLES WHOSE REPULSION OVAL REACHES THE CORRIDOR AROUND path ARE STAMPED.
+        if self.instrumentation is not None:
+            self.instrumentation.start_timer('get_occupancy_grid')
+        if obstacles is None:
+            obstacles = self.obstacles
         occupancy_grid = g.Grid(self.environment.grid_h, self.environment.grid_w)
         occupancy_grid.put_start(self.environment.start_x, self.environment.start_y)
         occupancy_grid.put_end(self.environment.end_x, self.environment.end_y)
-        for timestep in self.obstacles:
-            for obstacle_id in self.obstacles[timestep]['colliding']:
-                obstacle_x = self.obstacles[timestep]['colliding'][obstacle_id]['x']
-                obstacle_y = self.obstacles[timestep]['colliding'][obstacle_id]['y']
-                obstacle_dx = self.obstacles[timestep]['colliding'][obstacle_id]['dx']
-                obstacle_dy = self.obstacles[timestep]['colliding'][obstacle_id]['dy']
-                major_axis = self.obstacles[timestep]['colliding'][obstacle_id]['major_axis']
-                minor_axis = self.obstacles[timestep]['colliding'][obstacle_id]['minor_axis']
-                occupancy_grid.put_obstacle(obstacle_id, obstacle_x, obstacle_y, obstacle_dx, obstacle_dy, major_axis, minor_axis)
-            for obstacle_id in self.obstacles[timestep]['other']:
-                obstacle_x = self.obstacles[timestep]['other'][obstacle_id]['x']
-                obstacle_y = self.obstacles[timestep]['other'][obstacle_id]['y']
-                obstacle_dx = self.obstacles[timestep]['other'][obstacle_id]['dx']
-                obstacle_dy = self.obstacles[timestep]['other'][obstacle_id]['dy']
-                major_axis = self.obstacles[timestep]['other'][obstacle_id]['major_axis']
-                minor_axis = self.obstacles[timestep]['other'][obstacle_id]['minor_axis']
-                occupancy_grid.put_obstacle(obstacle_id, obstacle_x, obstacle_y, obstacle_dx, obstacle_dy, major_axis, minor_axis)
+        corridor = None
+        if path is not None and corridor_width is not None:
+            corridor = self.get_corridor(path, corridor_width)
+        for timestep in obstacles:
+            timestep_obstacles = {**obstacles[timestep]['colliding'], **obstacles[timestep]['other']}
+            if corridor is not None:
+                timestep_obstacles = {obstacle_id: timestep_obstacles[obstacle_id] for obstacle_id in timestep_obstacles if self.is_in_corridor(occupancy_grid, timestep_obstacles[obstacle_id], corridor)}
+            occupancy_grid.put_obstacles(timestep_obstacles)
+            if self.instrumentation is not None:
+                self.instrumentation.count('stamped_obstacles', len(timestep_obstacles))
         occupancy_grid.calculate_distances()
+        if self.instrumentation is not None:
+            self.instrumentation.stop_timer('get_occupancy_grid')
         return occupancy_grid
+
+    def is_in_corridor(self, occupancy_grid, obstacle, corridor):
+        index_x, index_y = occupancy_grid.get_oval_footprint(obstacle['x'], obstacle['y'], obstacle['dx'], obstacle['dy'], obstacle['major_axis'], obstacle['minor_axis'])
+        index_x, index_y = np.append(index_x, obstacle['x']), np.append(index_y, obstacle['y'])
+        inside = (index_x > -1) & (index_x < occupancy_grid.grid_w) & (index_y > -1) & (index_y < occupancy_grid.grid_h)
+        return bool(corridor[index_y[inside], index_x[inside]].any())
+
+    def get_reservation_table(self, occupancy_grid):
+        reservation_table = r.ReservationTable(occupancy_grid, self.environment.horizon)
+        reservation_table.put_obstacles(self.environment.obstacles)
+        return reservation_table
+
+    def update_occupancy_grid(self, occupancy_grid):
+        # MOVES THE OBSTACLES OF AN EXISTING GRID TO THE LATEST get_obstacles RESULT AND RETURNS THE CELLS THAT CHANGED, FOR Bstar.replan.
+        obstacles = {}
+        for timestep in self.obstacles:
+            obstacles.update(self.obstacles[timestep]['colliding'])
+            obstacles.update(self.obstacles[timestep]['other'])
+        changed_cells = set()
+        for obstacle_id in list(occupancy_grid.obstacles):
+            if obstacle_id not in obstacles or obstacles[obstacle_id] != occupancy_grid.obstacles[obstacle_id]:
+                changed_cells = changed_cells | occupancy_grid.remove_obstacle(obstacle_id)
+        for obstacle_id in obstacles:
+            if obstacle_id not in occupancy_grid.obstacles:
+                obstacle = obstacles[obstacle_id]
+                changed_cells = changed_cells | occupancy_grid.put_obstacle(obstacle_id, obstacle['x'], obstacle['y'], obstacle['dx'], obstacle['dy'], obstacle['major_axis'], obstacle['minor_axis'])
+        return changed_cells
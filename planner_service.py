@@ -0,0 +1,114 @@
+import time
+import asyncio
+import batch as ba
+from concurrent.futures import ProcessPoolExecutor
+
+class PlannerService:
+    # ASYNC SENSE -> PLAN -> ACT. OBSTACLE UPDATES (THE Environment.set_obstacles FORMAT) AND GOALS ONLY CHANGE THE LATEST STATE, BURSTS ARE COALESCED FOR coalesce_time
+    # AND EVERY STATE IS PLANNED WITH batch.plan_scenario IN THE EXECUTOR. A PLAN STILL WAITING FOR A WORKER WHEN NEWER INPUT ARRIVES IS CANCELLED, A RUNNING ONE CANNOT BE STOPPED,
+    # SO PATHS ARE PUBLISHED LATEST WINS: A RESULT OLDER THAN THE LAST PUBLISHED ONE IS DROPPED.
+    def __init__(self, grid_h, grid_w, movement='queen', max_speed=1, k_factor=0.5, obstacle_penalty=500, coalesce_time=0.05, executor=None):
+        self.grid_h = grid_h
+        self.grid_w = grid_w
+        self.movement = movement
+        self.max_speed = max_speed
+        self.k_factor = k_factor
+        self.obstacle_penalty = obstacle_penalty
+        self.coalesce_time = coalesce_time
+        self.owns_executor = executor is None
+        self.executor = ProcessPoolExecutor(max_workers=2) if executor is None else executor
+        self.obstacles = {}
+        self.goal = None
+        self.version = 0
+        self.version_time = time.perf_counter()
+        self.published_version = 0
+        self.cancelled_count = 0
+        self.failed_count = 0
+        self.last_error = None
+        self.changed = asyncio.Event()
+        self.paths = asyncio.Queue()
+        self.closed = False
+
+    def is_inside_grid(self, x, y):
+        return -1 < x < self.grid_w and -1 < y < self.grid_h
+
+    def notify(self):
+        self.version = self.version + 1
+        self.version_time = time.perf_counter()
+        self.changed.set()
+
+    def put_obstacles(self, obstacles: dict):
+        for obstacle_id in obstacles:
+            self.obstacles[obstacle_id] = {key: obstacles[obstacle_id][key] for key in ['x', 'y', 'dx', 'dy', 'major_axis', 'minor_axis']}
+        self.notify()
+
+    def remove_obstacles(self, obstacle_ids):
+        for obstacle_id in obstacle_ids:
+            self.obstacles.pop(obstacle_id, None)
+        self.notify()
+
+    def set_goal(self, start_x, start_y, end_x, end_y):
+        if not self.is_inside_grid(start_x, start_y):
+            raise ValueError("START CANNOT BE OUTSIDE GRID.")
+        if not self.is_inside_grid(end_x, end_y):
+            raise ValueError("END CANNOT BE OUTSIDE GRID.")
+        self.goal = (start_x, start_y, end_x, end_y)
+        self.notify()
+
+    def get_scenario(self):
+        start_x, start_y, end_x, end_y = self.goal
+        return {'grid_h': self.grid_h, 'grid_w': self.grid_w, 'start_x': start_x, 'start_y': start_y, 'end_x': end_x, 'end_y': end_y, 'obstacles': dict(self.obstacles),
+                'movement': self.movement, 'max_speed': self.max_speed, 'k_factor': self.k_factor, 'obstacle_penalty': self.obstacle_penalty}
+
+    async def run(self):
+        # PUTS (version, path, seconds since the input of that version arrived) ON self.paths, path IS None WHEN THERE IS NO PATH OR THE PLAN RAISED, IN WHICH CASE
+        # THE EXCEPTION IS KEPT IN last_error AND THE SERVICE KEEPS RUNNING. RUNS UNTIL close().
+        loop = asyncio.get_running_loop()
+        in_flight = {}
+        change = asyncio.ensure_future(self.changed.wait())
+        try:
+            while not self.closed:
+                done, pending = await asyncio.wait(set(in_flight) | {change}, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    if future is change:
+                        continue
+                    version, version_time, concurrent_future = in_flight.pop(future)
+                    if version > self.published_version:
+                        self.published_version = version
+                        try:
+                            path = future.result()
+                        except Exception as error:
+                            path = None
+                            self.failed_count = self.failed_count + 1
+                            self.last_error = error
+                        await self.paths.put((version, path, time.perf_counter() - version_time))
+                if change in done and not self.closed:
+                    await asyncio.sleep(self.coalesce_time)
+                    self.changed.clear()
+                    change = asyncio.ensure_future(self.changed.wait())
+                    for future in list(in_flight):
+                        if in_flight[future][2].cancel():
+                            in_flight.pop(future)
+                            self.cancelled_count = self.cancelled_count + 1
+                    if self.goal is not None:
+                        concurrent_future = self.executor.submit(ba.plan_scenario, self.get_scenario())
+                        in_flight[asyncio.wrap_future(concurrent_future, loop=loop)] = (self.version, self.version_time, concurrent_future)
+        finally:
+            change.cancel()
+            for future in in_flight:
+                in_flight[future][2].cancel()
+            if self.owns_executor:
+                await asyncio.to_thread(self.executor.shutdown, wait=True, cancel_futures=True)
+            await self.paths.put(None)
+
+    async def stream(self):
+        # YIELDS WHAT run PUBLISHES AND ENDS ONCE run HAS STOPPED.
+        while True:
+            item = await self.paths.get()
+            if item is None:
+                break
+            yield item
+
+    def close(self):
+        self.closed = True
+        self.changed.set()
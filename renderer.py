@@ -0,0 +1,148 @@
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+import matplotlib.image as mpimg
+import matplotlib.colors as mcolors
+import matplotlib.animation as animation
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+class Renderer:
+    # DRAWS THE GRID AS ONE IMAGE INSTEAD OF ONE PATCH PER CELL AND MOVES THE ROBOT AND OBSTACLES WITH BLITTING.
+    # headless=True NEVER TOUCHES pyplot, SO FRAMES AND VIDEOS CAN BE WRITTEN ON MACHINES WITHOUT A DISPLAY.
+    def __init__(self, headless=False, figsize=(12, 12), dpi=100):
+        self.headless = headless
+        self.figsize = figsize
+        self.dpi = dpi
+
+    def get_figure(self):
+        if self.headless:
+            fig = Figure(figsize=self.figsize, dpi=self.dpi)
+            FigureCanvasAgg(fig)
+            ax = fig.add_subplot(1, 1, 1)
+        else:
+            fig, ax = plt.subplots(1, 1, figsize=self.figsize, dpi=self.dpi)
+        return fig, ax
+
+    def get_grid_image(self, occupancy_grid):
+        # LATER ASSIGNMENTS WIN, SO start > end > obstacle > repulsion LIKE THE if CHAIN IN Grid.plot_grid.
+        image = np.ones((occupancy_grid.grid_h, occupancy_grid.grid_w, 3))
+        image[occupancy_grid.repulsion_factor > 0.0] = mcolors.to_rgb('grey')
+        image[occupancy_grid.obstacle] = mcolors.to_rgb('black')
+        image[occupancy_grid.end] = mcolors.to_rgb('red')
+        image[occupancy_grid.start] = mcolors.to_rgb('green')
+        return image
+
+    def setup_axes(self, ax, grid_h, grid_w, image):
+        # extent PUTS CELL (x, y) ON [x, x + 1] x [y, y + 1] WITH y GROWING DOWNWARDS, THE SAME LAYOUT AS THE PATCH PLOTS.
+        ax.imshow(image, extent=(0, grid_w, grid_h, 0), interpolation='nearest', aspect='auto')
+        ax.set_xlim(0, grid_w)
+        ax.set_ylim(grid_h, 0)
+        # ONE TICK PER CELL IS MORE EXPENSIVE TO DRAW THAN THE IMAGE ITSELF ON LARGE GRIDS.
+        if max(grid_h, grid_w) <= 50:
+            ax.set_xticks([i for i in range(grid_w + 1)])
+            ax.set_yticks([i for i in range(grid_h + 1)])
+            ax.grid(True, alpha=1)
+
+    def get_obstacle_positions(self, environment, timesteps):
+        # RETURNS x AND y ARRAYS OF SHAPE (len(timesteps), len(obstacle_ids)).
+        timesteps = np.asarray(timesteps, dtype=np.int64)[:, None]
+        return environment.obstacle_states[:, 0] + (timesteps * environment.obstacle_states[:, 2]), environment.obstacle_states[:, 1] + (timesteps * environment.obstacle_states[:, 3])
+
+    def show(self, fig, pause_time, output):
+        if output is not None:
+            fig.savefig(output)
+        elif self.headless:
+            raise ValueError("HEADLESS RENDERING NEEDS AN OUTPUT PATH.")
+        else:
+            plt.show(block=False)
+            plt.pause(pause_time)
+        if not self.headless:
+            plt.close(fig)
+
+    def draw_grid(self, occupancy_grid, robot_path=None, pause_time=1.0, text=True, output=None):
+        fig, ax = self.get_figure()
+        self.setup_axes(ax, occupancy_grid.grid_h, occupancy_grid.grid_w, self.get_grid_image(occupancy_grid))
+        if text:
+            # ONLY CELLS WITH SOMETHING TO SHOW GET A TEXT ARTIST.
+            for i, j in zip(*np.nonzero(~np.isnan(occupancy_grid.k))):
+                ax.text(j + 0.5, i + 0.3, f'{round(float(occupancy_grid.k[i, j]), 1)}', horizontalalignment='center', verticalalignment='center', color='black')
+            for i, j in zip(*np.nonzero(occupancy_grid.repulsion_factor > 0.0)):
+                ax.text(j + 0.5, i + 0.8, f'{round(float(occupancy_grid.repulsion_factor[i, j]), 1)}', horizontalalignment='center', verticalalignment='center', color='black')
+        if robot_path is not None:
+            ax.plot([robot_path[timestep]['x'] + 0.5 for timestep in robot_path], [robot_path[timestep]['y'] + 0.5 for timestep in robot_path], marker='o', label='ROBOT PATH')
+            ax.legend(loc='best')
+        self.show(fig, pause_time, output)
+
+    def simulate(self, environment, pause_time=1.0, output=None):
+        # output=None SHOWS THE RUN, A PATH WITH AN EXTENSION (.gif, .mp4, ...) WRITES A VIDEO AND ANY OTHER PATH IS A DIRECTORY OF PNG FRAMES.
+        robot_path = environment.robot_path
+        timesteps = list(robot_path)
+        if len(timesteps) == 0:
+            return
+        if self.headless and output is None:
+            raise ValueError("HEADLESS RENDERING NEEDS AN OUTPUT PATH.")
+        video = output is not None and os.path.splitext(output)[1] != ''
+        grid_h, grid_w = environment.grid_h, environment.grid_w
+        fig, ax = self.get_figure()
+        image = np.ones((grid_h, grid_w, 3))
+        image[environment.end_y, environment.end_x] = mcolors.to_rgb('red')
+        image[environment.start_y, environment.start_x] = mcolors.to_rgb('green')
+        self.setup_axes(ax, grid_h, grid_w, image)
+        # EVERYTHING THAT DOES NOT MOVE IS DRAWN ONCE.
+        trajectory_x, trajectory_y = self.get_obstacle_positions(environment, range(environment.horizon))
+        ax.add_collection(LineCollection(np.stack([trajectory_x.T + 0.5, trajectory_y.T + 0.5], axis=-1), colors='purple', alpha=0.5, label='OBSTACLE PATHS'))
+        ax.plot([robot_path[timestep]['x'] + 0.5 for timestep in timesteps], [robot_path[timestep]['y'] + 0.5 for timestep in timesteps], marker='o', label='ROBOT PATH')
+        ax.legend(loc='best')
+        # THE MOVING CELLS ARE ONE RGBA OVERLAY AND THE HEADINGS ONE QUIVER, ROW 0 IS THE ROBOT AND THE REST ARE THE OBSTACLES.
+        obstacle_x, obstacle_y = self.get_obstacle_positions(environment, timesteps)
+        frame = np.zeros((grid_h, grid_w, 4), dtype=np.uint8)
+        overlay = ax.imshow(frame, extent=(0, grid_w, grid_h, 0), interpolation='nearest', aspect='auto', animated=not video)
+        offsets = np.zeros((1 + len(environment.obstacle_ids), 2))
+        arrows = ax.quiver(offsets[:, 0], offsets[:, 1], np.zeros(len(offsets)), np.zeros(len(offsets)), angles='xy', scale_units='xy', scale=1, color='purple', animated=not video)
+        ax.set_xlim(0, grid_w)
+        ax.set_ylim(grid_h, 0)
+        directions = np.vstack([np.zeros((1, 2)), environment.obstacle_states[:, 2:4]])
+        lime, black = np.array(mcolors.to_rgba_array('lime')[0] * 255, dtype=np.uint8), np.array(mcolors.to_rgba_array('black')[0] * 255, dtype=np.uint8)
+
+        def update(index):
+            timestep = timesteps[index]
+            frame[:] = 0
+            frame[robot_path[timestep]['y'], robot_path[timestep]['x']] = lime
+            inside = (obstacle_x[index] >= 0) & (obstacle_x[index] < grid_w) & (obstacle_y[index] >= 0) & (obstacle_y[index] < grid_h)
+            frame[obstacle_y[index][inside], obstacle_x[index][inside]] = black
+            overlay.set_data(frame)
+            offsets[0] = robot_path[timestep]['x'] + 0.5, robot_path[timestep]['y'] + 0.5
+            offsets[1:, 0], offsets[1:, 1] = obstacle_x[index] + 0.5, obstacle_y[index] + 0.5
+            directions[0] = robot_path[timestep]['dx'], robot_path[timestep]['dy']
+            arrows.set_offsets(offsets)
+            arrows.set_UVC(directions[:, 0], directions[:, 1])
+
+        if video:
+            # MOVIE WRITERS GRAB WHOLE FRAMES, WHICH IS CHEAP NOW THAT THE GRID IS A SINGLE IMAGE.
+            writer = animation.PillowWriter(fps=1.0 / pause_time) if output.endswith('.gif') else animation.FFMpegWriter(fps=1.0 / pause_time)
+            with writer.saving(fig, output, self.dpi):
+                for index in range(len(timesteps)):
+                    update(index)
+                    writer.grab_frame()
+        else:
+            if output is not None:
+                os.makedirs(output, exist_ok=True)
+            else:
+                plt.show(block=False)
+            fig.canvas.draw()
+            background = fig.canvas.copy_from_bbox(fig.bbox)
+            for index in range(len(timesteps)):
+                update(index)
+                fig.canvas.restore_region(background)
+                ax.draw_artist(overlay)
+                ax.draw_artist(arrows)
+                if output is not None:
+                    mpimg.imsave(os.path.join(output, f'{timesteps[index]:05d}.png'), np.asarray(fig.canvas.buffer_rgba()), pil_kwargs={'compress_level': 1})
+                else:
+                    fig.canvas.blit(fig.bbox)
+                    fig.canvas.flush_events()
+                    fig.canvas.start_event_loop(pause_time)
+        if not self.headless:
+            plt.close(fig)
@@ -0,0 +1,40 @@
+class ReservationTable:
+    def __init__(self, occupancy_grid, horizon=None):
+        self.occupancy_grid = occupancy_grid
+        self.horizon = horizon if horizon is not None else occupancy_grid.grid_h + occupancy_grid.grid_w
+        self.reset_table()
+
+    def reset_table(self):
+        self.obstacles = {}
+        self.reserved = {}
+
+    def put_obstacles(self, obstacles: dict):
+        # OBSTACLES USE THE Environment.set_obstacles FORMAT, THEIR POSITION AT ANY TIMESTEP IS x + timestep * dx, y + timestep * dy.
+        for obstacle_id in obstacles:
+            self.obstacles[obstacle_id] = {
+                'x': obstacles[obstacle_id]['x'],
+                'y': obstacles[obstacle_id]['y'],
+                'dx': obstacles[obstacle_id]['dx'],
+                'dy': obstacles[obstacle_id]['dy'],
+                'major_axis': obstacles[obstacle_id]['major_axis'],
+                'minor_axis': obstacles[obstacle_id]['minor_axis'],
+                }
+        self.reserved = {}
+
+    def get_reserved(self, timestep):
+        # CELLS TAKEN BY AN OBSTACLE OR ITS REPULSION OVAL AT timestep, BUILT THE FIRST TIME THE TIMESTEP IS ASKED FOR.
+        if timestep not in self.reserved:
+            reserved = set()
+            for obstacle_id in self.obstacles:
+                obstacle = self.obstacles[obstacle_id]
+                obstacle_x, obstacle_y = obstacle['x'] + (timestep * obstacle['dx']), obstacle['y'] + (timestep * obstacle['dy'])
+                if self.occupancy_grid.is_inside_grid(obstacle_x, obstacle_y):
+                    reserved.add((obstacle_x, obstacle_y))
+                index_x, index_y = self.occupancy_grid.get_oval_footprint(obstacle_x, obstacle_y, obstacle['dx'], obstacle['dy'], obstacle['major_axis'], obstacle['minor_axis'])
+                inside = (index_x > -1) & (index_x < self.occupancy_grid.grid_w) & (index_y > -1) & (index_y < self.occupancy_grid.grid_h)
+                reserved.update(zip(index_x[inside].tolist(), index_y[inside].tolist()))
+            self.reserved[timestep] = reserved
+        return self.reserved[timestep]
+
+    def is_reserved(self, x, y, timestep):
+        return (x, y) in self.get_reserved(timestep)
@@ -0,0 +1,14 @@
+class SpatialIndex:
+    # OBSTACLES ARE BUCKETED BY VELOCITY AND THEN BY START CELL. AN OBSTACLE IS AT (x, y) AT timestep EXACTLY WHEN IT STARTED AT (x - timestep * dx, y - timestep * dy),
+    # SO A QUERY ONLY LOOKS AT ONE CELL PER DISTINCT VELOCITY, HOWEVER MANY OBSTACLES THERE ARE.
+    def __init__(self, obstacle_ids, obstacle_states):
+        self.obstacle_ids = obstacle_ids
+        self.buckets = {}
+        for index, (x, y, dx, dy) in enumerate(obstacle_states.tolist()):
+            self.buckets.setdefault((dx, dy), {}).setdefault((x, y), []).append(index)
+
+    def query(self, x, y, timestep):
+        indices = []
+        for (dx, dy), cells in self.buckets.items():
+            indices.extend(cells.get((x - (timestep * dx), y - (timestep * dy)), []))
+        return [self.obstacle_ids[index] for index in sorted(indices)]
@@ -0,0 +1,62 @@
+import random
+import grid as g
+import bstar as b
+import perception as p
+import environment as e
+
+def test_low_penalty_path_avoids_blocked_cells():
+    # A PENALTY FAR BELOW THE COSTS TO GO, SO BLOCKED CELLS NEXT TO THE PATH HOLD THE SMALLEST k AROUND.
+    occupancy_grid = g.Grid(30, 30)
+    occupancy_grid.put_obstacles({obstacle_id: {'x': x, 'y': y, 'dx': 0, 'dy': 1, 'major_axis': [-3, 3], 'minor_axis': [0, 0]} for obstacle_id, (x, y) in enumerate([(8, 6), (15, 15), (22, 22), (10, 20)])})
+    occupancy_grid.put_start(0, 0)
+    occupancy_grid.put_end(29, 29)
+    occupancy_grid.calculate_distances()
+    path = b.Bstar(occupancy_grid, 5).find_path('queen', 1, 0.5)
+    assert path is not None
+    cells = [(path[timestep]['x'], path[timestep]['y']) for timestep in path]
+    assert cells[-1] == (29, 29)
+    assert len(set(cells)) == len(cells)
+    assert all(occupancy_grid.is_free_to_move(x, y) for x, y in cells[1:-1])
+
+def get_cost(path):
+    return sum(path[timestep]['speed'] for timestep in path)
+
+def make_obstacle(rng, grid_h, grid_w):
+    return {'x': rng.randrange(grid_w), 'y': rng.randrange(grid_h), 'dx': rng.choice([-1, 0, 1]), 'dy': rng.choice([-1, 0, 1]), 'major_axis': [-rng.randint(0, 2), rng.randint(0, 2)], 'minor_axis': [-1, 1]}
+
+def test_replan_matches_find_path():
+    # OBSTACLES JUMP AROUND, ONTO THE START TOO, AND EVERY REPAIR HAS TO AGREE WITH A FRESH SEARCH ON THE SAME GRID.
+    for seed in range(40):
+        rng = random.Random(seed)
+        environment = e.Environment(20, 20)
+        environment.set_start(rng.randrange(20), rng.randrange(20))
+        environment.set_end(rng.randrange(20), rng.randrange(20))
+        watcher = p.Perception(environment)
+        obstacles = {obstacle_id: make_obstacle(rng, 20, 20) for obstacle_id in range(4)}
+        occupancy_grid = watcher.get_occupancy_grid({0: {'colliding': {}, 'other': obstacles}})
+        planner = b.Bstar(occupancy_grid, 500)
+        planner.find_path()
+        for step in range(3):
+            obstacles = {**obstacles, rng.randrange(4): make_obstacle(rng, 20, 20)}
+            watcher.obstacles = {0: {'colliding': {}, 'other': obstacles}}
+            path = planner.replan(watcher.update_occupancy_grid(occupancy_grid))
+            fresh_path = b.Bstar(watcher.get_occupancy_grid(), 500).find_path()
+            assert (path is None) == (fresh_path is None)
+            if path is not None:
+                cells = [(path[timestep]['x'], path[timestep]['y']) for timestep in path]
+                assert cells[0] == (environment.start_x, environment.start_y) and cells[-1] == (environment.end_x, environment.end_y)
+                assert all(occupancy_grid.is_free_to_move(x, y) for x, y in cells[1:-1])
+                # THE REPAIRED FIELD IS SETTLED AROUND THE ROUTE WHILE A FRESH ONE CAN STILL HOLD OPEN CELLS THE GREEDY EXTRACTION STEPS ON, SO THE REPAIRED PATH IS NEVER LONGER.
+                assert get_cost(path) <= get_cost(fresh_path) + 1e-9
+
+def test_timed_path_refuses_a_reserved_start():
+    # THE OBSTACLE SITS ON THE START AT TIMESTEP 0 AND DRIVES AWAY, THE ROBOT WOULD ALREADY BE INSIDE IT.
+    for obstacle_x, expect_path in [(10, False), (3, True)]:
+        environment = e.Environment(20, 20)
+        environment.set_start(10, 19)
+        environment.set_end(10, 0)
+        environment.set_obstacles({'a': {'x': obstacle_x, 'y': 19, 'dx': 1, 'dy': 0, 'major_axis': [0, 0], 'minor_axis': [0, 0]}})
+        watcher = p.Perception(environment)
+        occupancy_grid = watcher.get_occupancy_grid({})
+        path = b.Bstar(occupancy_grid, 500).find_timed_path(watcher.get_reservation_table(occupancy_grid))
+        assert (path is not None) == expect_path
@@ -0,0 +1,67 @@
+import math
+import random
+import grid as g
+import numpy as np
+
+# THE PER CELL LOOPS grid.py USED BEFORE THE FIELDS BECAME ARRAYS, KEPT HERE AS THE REFERENCE THE VECTORIZED CODE MUST MATCH.
+def reference_repulsion(grid_h, grid_w, obstacles):
+    repulsion = [[0.0 for j in range(grid_w)] for i in range(grid_h)]
+    for obstacle in obstacles.values():
+        for major in range(obstacle['major_axis'][0], obstacle['major_axis'][1] + 1, 1):
+            center_x, center_y = obstacle['x'] + major * obstacle['dx'], obstacle['y'] + major * obstacle['dy']
+            for i in range(obstacle['minor_axis'][0], obstacle['minor_axis'][1] + 1, 1):
+                for j in range(obstacle['minor_axis'][0], obstacle['minor_axis'][1] + 1, 1):
+                    index_x, index_y = center_x + i, center_y + j
+                    if -1 < index_x < grid_w and -1 < index_y < grid_h:
+                        repulsion[index_y][index_x] = repulsion[index_y][index_x] + 1.0
+    return np.array(repulsion)
+
+def reference_distances(grid_h, grid_w, x, y):
+    return np.array([[math.sqrt(math.pow(x - j, 2) + math.pow(y - i, 2)) for j in range(grid_w)] for i in range(grid_h)])
+
+def make_obstacles(grid_h, grid_w, count, seed):
+    # CENTRES UP TO 3 CELLS OUTSIDE THE GRID AND LONG AXES, SO OVALS GET CLIPPED AT THE BORDER AND OVERLAP EACH OTHER.
+    rng = random.Random(seed)
+    obstacles = {}
+    for obstacle_id in range(count):
+        major, minor = rng.randint(0, 4), rng.randint(0, 2)
+        obstacles[obstacle_id] = {'x': rng.randint(-3, grid_w + 2), 'y': rng.randint(-3, grid_h + 2), 'dx': rng.randint(-1, 1), 'dy': rng.randint(-1, 1),
+                                  'major_axis': [-rng.randint(0, major), major], 'minor_axis': [-minor, rng.randint(0, minor)]}
+    return obstacles
+
+def test_put_obstacle_matches_loops():
+    for seed in range(20):
+        obstacles = make_obstacles(15, 12, 8, seed)
+        occupancy_grid = g.Grid(15, 12)
+        for obstacle_id in obstacles:
+            obstacle = obstacles[obstacle_id]
+            occupancy_grid.put_obstacle(obstacle_id, obstacle['x'], obstacle['y'], obstacle['dx'], obstacle['dy'], obstacle['major_axis'], obstacle['minor_axis'])
+        assert np.array_equal(occupancy_grid.repulsion_factor, reference_repulsion(15, 12, obstacles))
+
+def test_put_obstacles_matches_loops():
+    for seed in range(20):
+        obstacles = make_obstacles(10, 17, 12, seed)
+        occupancy_grid = g.Grid(10, 17)
+        occupancy_grid.put_obstacles(obstacles)
+        assert np.array_equal(occupancy_grid.repulsion_factor, reference_repulsion(10, 17, obstacles))
+        for obstacle in obstacles.values():
+            if -1 < obstacle['x'] < 17 and -1 < obstacle['y'] < 10:
+                assert occupancy_grid.obstacle[obstacle['y'], obstacle['x']]
+
+def test_overlapping_obstacles_add_up():
+    obstacles = {'a': {'x': 0, 'y': 0, 'dx': 1, 'dy': 1, 'major_axis': [-2, 2], 'minor_axis': [-1, 1]},
+                 'b': {'x': 1, 'y': 1, 'dx': 1, 'dy': 0, 'major_axis': [-2, 2], 'minor_axis': [-1, 1]}}
+    occupancy_grid = g.Grid(6, 6)
+    occupancy_grid.put_obstacles(obstacles)
+    expected = reference_repulsion(6, 6, obstacles)
+    assert expected.max() > 2.0
+    assert np.array_equal(occupancy_grid.repulsion_factor, expected)
+
+def test_calculate_distances_matches_loops():
+    for grid_h, grid_w, start, end in [(7, 9, (0, 6), (8, 0)), (12, 5, (2, 3), (2, 3)), (1, 1, (0, 0), (0, 0))]:
+        occupancy_grid = g.Grid(grid_h, grid_w)
+        occupancy_grid.put_start(*start)
+        occupancy_grid.put_end(*end)
+        occupancy_grid.calculate_distances()
+        assert np.allclose(occupancy_grid.start_distance, reference_distances(grid_h, grid_w, *start))
+        assert np.allclose(occupancy_grid.end_distance, reference_distances(grid_h, grid_w, *end))
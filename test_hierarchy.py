@@ -0,0 +1,61 @@
+import copy
+import random
+import grid as g
+import bstar as b
+import hierarchy as h
+
+OBSTACLE_PENALTY = 2300
+
+def make_grid(start, end, obstacles, size=40):
+    occupancy_grid = g.Grid(size, size)
+    occupancy_grid.put_obstacles(obstacles)
+    occupancy_grid.put_start(*start)
+    occupancy_grid.put_end(*end)
+    occupancy_grid.calculate_distances()
+    return occupancy_grid
+
+def check_path(occupancy_grid, path):
+    cells = [(path[timestep]['x'], path[timestep]['y']) for timestep in path]
+    assert cells[0] == (occupancy_grid.start_x, occupancy_grid.start_y)
+    assert cells[-1] == (occupancy_grid.end_x, occupancy_grid.end_y)
+    for (x1, y1), (x2, y2) in zip(cells[:-1], cells[1:]):
+        assert max(abs(x2 - x1), abs(y2 - y1)) == 1
+        assert occupancy_grid.is_free_to_move(x2, y2) or (x2, y2) == cells[-1]
+
+def test_start_in_repulsion_has_no_path():
+    occupancy_grid = make_grid((3, 2), (35, 36), {'a': {'x': 3, 'y': 3, 'dx': 1, 'dy': 0, 'major_axis': [-1, 1], 'minor_axis': [-1, 1]}})
+    assert b.Bstar(copy.deepcopy(occupancy_grid), OBSTACLE_PENALTY).find_path() is None
+    assert h.HierarchicalPlanner(occupancy_grid, OBSTACLE_PENALTY, 8).find_path() is None
+
+def test_update_then_find_path():
+    occupancy_grid = make_grid((3, 2), (35, 36), {'a': {'x': 20, 'y': 20, 'dx': 1, 'dy': 0, 'major_axis': [-2, 2], 'minor_axis': [-1, 1]}})
+    planner = h.HierarchicalPlanner(occupancy_grid, OBSTACLE_PENALTY, 8)
+    check_path(occupancy_grid, planner.find_path())
+    # THE OBSTACLE JUMPS ONTO THE START, SO THE CACHED GRAPH AROUND IT IS STALE UNTIL update AND THE START CAN NO LONGER MOVE.
+    occupancy_grid.put_obstacle('b', 3, 3, 1, 0, [-1, 1], [-1, 1])
+    planner.update([(x, y) for x in range(1, 6) for y in range(1, 6)])
+    assert planner.find_path() is None
+    occupancy_grid.remove_obstacle('b')
+    planner.update([(x, y) for x in range(1, 6) for y in range(1, 6)])
+    check_path(occupancy_grid, planner.find_path())
+
+def get_cost(path):
+    return sum(path[timestep]['speed'] for timestep in path)
+
+def test_cost_close_to_find_path():
+    # SMALL CLUSTERS AND WINDOWS, SO EVERY ROUTE IS REFINED IN SEVERAL WINDOWS AND SMOOTHED WHERE THEY MEET.
+    ratios = []
+    for seed in range(10):
+        rng = random.Random(seed)
+        obstacles = {obstacle_id: {'x': rng.randrange(64), 'y': rng.randrange(64), 'dx': rng.randint(-1, 1), 'dy': rng.randint(-1, 1),
+                                   'major_axis': [-rng.randint(0, 3), rng.randint(0, 3)], 'minor_axis': [-1, 1]} for obstacle_id in range(60)}
+        occupancy_grid = make_grid((0, 0), (63, 63), obstacles, 64)
+        free = [(x, y) for y in range(64) for x in range(64) if occupancy_grid.is_free_to_move(x, y)]
+        start, end = rng.choice(free), rng.choice(free)
+        for max_speed in [1, 3]:
+            flat_path = b.Bstar(make_grid(start, end, obstacles, 64), OBSTACLE_PENALTY).find_path('queen', max_speed)
+            path = h.HierarchicalPlanner(make_grid(start, end, obstacles, 64), OBSTACLE_PENALTY, 8, window_clusters=2).find_path(max_speed)
+            assert (path[0]['x'], path[0]['y']) == start and (path[len(path) - 1]['x'], path[len(path) - 1]['y']) == end
+            ratios.append(get_cost(path) / get_cost(flat_path))
+    assert max(ratios) < 1.1
+    assert sum(ratios) / len(ratios) < 1.03
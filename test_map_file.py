@@ -0,0 +1,58 @@
+import copy
+import pytest
+import grid as g
+import numpy as np
+import bstar as b
+import map_file as m
+
+OBSTACLES = {'a': {'x': 5, 'y': 5, 'dx': 1, 'dy': 0, 'major_axis': [-1, 1], 'minor_axis': [-1, 1]},
+             7: {'x': 12, 'y': 9, 'dx': 0, 'dy': 1, 'major_axis': [-2, 1], 'minor_axis': [0, 0]},
+             ('truck', 2): {'x': 3, 'y': 14, 'dx': 1, 'dy': -1, 'major_axis': [-1, 2], 'minor_axis': [-1, 0]}}
+
+def make_grid():
+    occupancy_grid = g.Grid(20, 24)
+    occupancy_grid.put_obstacles(OBSTACLES)
+    occupancy_grid.put_start(0, 19)
+    occupancy_grid.put_end(23, 0)
+    occupancy_grid.calculate_distances()
+    return occupancy_grid
+
+def test_round_trip(tmp_path):
+    occupancy_grid = make_grid()
+    b.Bstar(occupancy_grid, 500).find_path()
+    map_file = m.MapFile(str(tmp_path / 'site.map'))
+    map_file.save(occupancy_grid, tuple(m.FIELDS))
+    loaded = map_file.load()
+    assert (loaded.grid_h, loaded.grid_w) == (20, 24)
+    assert (loaded.start_x, loaded.start_y, loaded.end_x, loaded.end_y) == (0, 19, 23, 0)
+    assert loaded.obstacles == occupancy_grid.obstacles
+    for name in m.FIELDS:
+        assert np.array_equal(getattr(loaded, name), getattr(occupancy_grid, name), equal_nan=True)
+    assert np.array_equal(loaded.start, occupancy_grid.start) and np.array_equal(loaded.end, occupancy_grid.end)
+
+def test_find_path_on_loaded_grid(tmp_path):
+    path = str(tmp_path / 'site.map')
+    m.MapFile(path).save(make_grid())
+    with open(path, 'rb') as file:
+        saved = file.read()
+    expected = b.Bstar(make_grid(), 500).find_path()
+    # mode='c' WRITES k INTO PRIVATE PAGES AND mode='r' INTO A PRIVATE COPY, NEITHER MAY TOUCH THE FILE.
+    for mode in ['c', 'r']:
+        loaded = m.MapFile(path).load(mode)
+        assert b.Bstar(loaded, 500).find_path() == expected
+        del loaded
+        with open(path, 'rb') as file:
+            assert file.read() == saved
+
+def test_read_only_fields_stay_shared(tmp_path):
+    path = str(tmp_path / 'site.map')
+    m.MapFile(path).save(make_grid())
+    loaded = m.MapFile(path).load('r')
+    assert isinstance(loaded.obstacle, np.memmap) and not loaded.obstacle.flags.writeable
+    assert loaded.k.flags.writeable
+
+def test_unstorable_obstacle_id(tmp_path):
+    occupancy_grid = make_grid()
+    occupancy_grid.put_obstacle(frozenset(['a']), 15, 15, 0, 0, [0, 0], [0, 0])
+    with pytest.raises(ValueError):
+        m.MapFile(str(tmp_path / 'site.map')).save(occupancy_grid)
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import batch as ba
+import environment as e
+import obstacle_feed as o
+import planner_service as ps
+from concurrent.futures import ThreadPoolExecutor
+
+OBSTACLES = {
+    'a': {'x': 9, 'y': 3, 'dx': 0, 'dy': 0, 'major_axis': [-1, 1], 'minor_axis': [-1, 1]},
+    'b': {'x': 1, 'y': 10, 'dx': 1, 'dy': 0, 'major_axis': [-1, 2], 'minor_axis': [-1, 1]},
+    }
+
+def make_environment():
+    environment = e.Environment(20, 20)
+    environment.set_start(2, 19)
+    environment.set_end(15, 0)
+    environment.set_obstacles(OBSTACLES)
+    return environment
+
+def test_feed_sends_one_update_per_obstacle_per_tick():
+    async def feed():
+        environment = make_environment()
+        service = ps.PlannerService(20, 20, executor=ThreadPoolExecutor(max_workers=1))
+        await o.ObstacleFeed(environment, service, tick_time=0.0, timesteps=4).run()
+        service.executor.shutdown()
+        return environment, service
+
+    environment, service = asyncio.run(feed())
+    assert service.goal == (2, 19, 15, 0)
+    assert service.version == 1 + (4 * len(OBSTACLES))
+    assert service.obstacles == {obstacle_id: environment.get_obstacle(obstacle_id, 3) for obstacle_id in OBSTACLES}
+
+def test_feed_update_cancels_the_pending_plan(monkeypatch):
+    # ONE WORKER HELD BY THE FIRST PLAN, SO THE PLAN OF THE NEXT TICK WAITS IN THE QUEUE UNTIL THE TICK AFTER IT SUPERSEDES IT.
+    plan_scenario = ba.plan_scenario
+    release = threading.Event()
+
+    def held_plan_scenario(scenario):
+        release.wait(30)
+        return plan_scenario(scenario)
+
+    async def serve():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            service = ps.PlannerService(20, 20, coalesce_time=0.01, executor=executor)
+            task = asyncio.ensure_future(service.run())
+            await o.ObstacleFeed(make_environment(), service, tick_time=0.1, timesteps=4).run()
+            release.set()
+            published = []
+            while len(published) == 0 or published[-1][0] < service.version:
+                published.append(await asyncio.wait_for(service.paths.get(), 30))
+            service.close()
+            await asyncio.wait_for(task, 30)
+            return service, published
+
+    monkeypatch.setattr(ba, 'plan_scenario', held_plan_scenario)
+    service, published = asyncio.run(serve())
+    assert service.cancelled_count > 0
+    assert published[-1][0] == service.version and all([published[index][0] < published[index + 1][0] for index in range(len(published) - 1)])
+    assert all([item[1] is not None for item in published])
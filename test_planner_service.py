@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import batch as ba
+import planner_service as ps
+from concurrent.futures import ThreadPoolExecutor
+
+def test_service_keeps_serving_after_a_failed_plan(monkeypatch):
+    plan_scenario = ba.plan_scenario
+
+    def failing_plan_scenario(scenario):
+        raise RuntimeError("PLANNER CRASHED.")
+
+    async def serve():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            service = ps.PlannerService(20, 20, coalesce_time=0.01, executor=executor)
+            task = asyncio.ensure_future(service.run())
+            # START AND END ARE NOT ON ONE ROW OR COLUMN.
+            service.set_goal(2, 19, 15, 0)
+            first = await asyncio.wait_for(service.paths.get(), 30)
+            monkeypatch.setattr(ba, 'plan_scenario', failing_plan_scenario)
+            service.put_obstacles({'a': {'x': 10, 'y': 10, 'dx': 1, 'dy': 0, 'major_axis': [-1, 1], 'minor_axis': [0, 0]}})
+            second = await asyncio.wait_for(service.paths.get(), 30)
+            monkeypatch.setattr(ba, 'plan_scenario', plan_scenario)
+            service.remove_obstacles(['a'])
+            third = await asyncio.wait_for(service.paths.get(), 30)
+            service.close()
+            await asyncio.wait_for(task, 30)
+            return service, first, second, third
+
+    service, first, second, third = asyncio.run(serve())
+    assert first[1] is not None and first[1][len(first[1]) - 1]['x'] == 15 and first[1][len(first[1]) - 1]['y'] == 0
+    assert second[1] is None and service.failed_count == 1 and isinstance(service.last_error, RuntimeError)
+    assert third[1] is not None and third[0] > second[0] > first[0]
+
+def test_error_is_recorded_in_last_error(monkeypatch):
+    def failing_plan_scenario(scenario):
+        raise ValueError("NO MAP.")
+
+    async def serve():
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            service = ps.PlannerService(20, 20, coalesce_time=0.01, executor=executor)
+            task = asyncio.ensure_future(service.run())
+            service.set_goal(2, 19, 15, 0)
+            published = await asyncio.wait_for(service.paths.get(), 30)
+            service.close()
+            await asyncio.wait_for(task, 30)
+            return service, published
+
+    monkeypatch.setattr(ba, 'plan_scenario', failing_plan_scenario)
+    service, published = asyncio.run(serve())
+    assert published[0] == 1 and published[1] is None
+    assert service.failed_count == 1 and isinstance(service.last_error, ValueError) and str(service.last_error) == "NO MAP."
+
+def test_older_result_is_dropped_once_a_newer_one_is_published(monkeypatch):
+    # TWO WORKERS, THE PLAN OF VERSION 1 IS HELD BACK UNTIL VERSION 2 HAS BEEN PUBLISHED.
+    release = {0: threading.Event(), 1: threading.Event()}
+    finished = threading.Event()
+
+    def held_plan_scenario(scenario):
+        obstacle_count = len(scenario['obstacles'])
+        release[obstacle_count].wait(30)
+        if obstacle_count == 0:
+            finished.set()
+        return obstacle_count
+
+    async def serve():
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            service = ps.PlannerService(20, 20, coalesce_time=0.01, executor=executor)
+            task = asyncio.ensure_future(service.run())
+            service.set_goal(2, 19, 15, 0)
+            await asyncio.sleep(0.2)
+            service.put_obstacles({'a': {'x': 10, 'y': 10, 'dx': 1, 'dy': 0, 'major_axis': [-1, 1], 'minor_axis': [0, 0]}})
+            await asyncio.sleep(0.2)
+            release[1].set()
+            newer = await asyncio.wait_for(service.paths.get(), 30)
+            release[0].set()
+            await asyncio.to_thread(finished.wait, 30)
+            await asyncio.sleep(0.2)
+            service.close()
+            await asyncio.wait_for(task, 30)
+            return service, newer, [item async for item in service.stream()]
+
+    monkeypatch.setattr(ba, 'plan_scenario', held_plan_scenario)
+    service, newer, rest = asyncio.run(serve())
+    assert finished.is_set()
+    assert newer[0] == 2 and newer[1] == 1
+    assert rest == [] and service.published_version == 2 and service.cancelled_count == 0
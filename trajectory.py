@@ -0,0 +1,29 @@
+import math
+
+class Trajectory:
+    # CONSTANT VELOCITY MOTION FROM (x, y), EVERY TIMESTEP IS WORKED OUT WHEN IT IS ASKED FOR INSTEAD OF BEING STORED.
+    def __init__(self, x, y, dx, dy, horizon):
+        self.x = x
+        self.y = y
+        self.dx = dx
+        self.dy = dy
+        self.horizon = horizon
+
+    def __getitem__(self, timestep):
+        if not 0 <= timestep < self.horizon:
+            raise KeyError(timestep)
+        return {'x': self.x + (timestep * self.dx),
+                'y': self.y + (timestep * self.dy),
+                'dx': self.dx,
+                'dy': self.dy,
+                'speed': math.sqrt(math.pow(self.dx, 2) + math.pow(self.dy, 2)),
+                }
+
+    def __contains__(self, timestep):
+        return 0 <= timestep < self.horizon
+
+    def __iter__(self):
+        return iter(range(self.horizon))
+
+    def __len__(self):
+        return self.horizon